@@ -1,43 +1,105 @@
-from collections import UserDict
-from collections.abc import Iterator
-from contextlib import contextmanager
+from collections.abc import ItemsView, Iterator, KeysView, MutableMapping, ValuesView
 from contextvars import ContextVar
-from typing import TypeVar
+from typing import Any, TypeVar
 
 from asgi_toolkit.protocol import ASGIApp, Receive, Scope, Send
 
 T = TypeVar("T")
 
 _http_request_context: ContextVar[dict] = ContextVar("ctx")
+_ctx_get = _http_request_context.get
+_ctx_set = _http_request_context.set
+_ctx_reset = _http_request_context.reset
 
 
 class RequestContextException(Exception):
     """Raised when request context is accessed outside of a request."""
 
 
-class Context(UserDict):
-    def __init__(self) -> None:
-        pass
+def _current() -> dict:
+    try:
+        return _ctx_get()
+    except LookupError as e:
+        raise RequestContextException(
+            "No request context available - make sure you are using the ContextMiddleware. "
+            "In case you're using Starlette based framework and using add_middleware method "
+            "make sure to call it after any middleware that uses http_request_context."
+        ) from e
+
+
+class Context(MutableMapping):
+    """Mapping view over the dict stored in the current request context.
+
+    Every operation goes straight to the underlying dict, so no intermediate
+    mapping layer is involved on the per-request path.
+    """
+
+    __slots__ = ()
 
     @property
-    def data(self) -> dict:  # type: ignore[override]
-        try:
-            return _http_request_context.get()
-        except LookupError as e:
-            raise RequestContextException(
-                "No request context available - make sure you are using the ContextMiddleware. "
-                "In case you're using Starlette based framework and using add_middleware method "
-                "make sure to call it after any middleware that uses http_request_context."
-            ) from e
-
-
-@contextmanager
-def new_context() -> Iterator[None]:
-    token = _http_request_context.set(dict())
-    try:
-        yield
-    finally:
-        _http_request_context.reset(token)
+    def data(self) -> dict:
+        return _current()
+
+    def __getitem__(self, key: Any) -> Any:
+        return _current()[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        _current()[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del _current()[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in _current()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(_current())
+
+    def __len__(self) -> int:
+        return len(_current())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({_current()!r})"
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return _current().get(key, default)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        return _current().setdefault(key, default)
+
+    def keys(self) -> KeysView[Any]:
+        return _current().keys()
+
+    def values(self) -> ValuesView[Any]:
+        return _current().values()
+
+    def items(self) -> ItemsView[Any, Any]:
+        return _current().items()
+
+    def clear(self) -> None:
+        _current().clear()
+
+    def as_dict(self) -> dict:
+        """Return a shallow copy of the current request context."""
+        return _current().copy()
+
+
+class new_context:
+    """Set a fresh, empty request context for the duration of a `with` block.
+
+    Entering returns the context dict so middleware can fill it directly. A slotted class is used
+    instead of `contextlib.contextmanager` to avoid building a generator per request.
+    """
+
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> dict:
+        context: dict = {}
+        self._token = _ctx_set(context)
+        return context
+
+    def __exit__(self, *exc_info: object) -> None:
+        _ctx_reset(self._token)
 
 
 class ContextMiddleware:
@@ -47,11 +109,12 @@ class ContextMiddleware:
         self.app = app
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if not scope["type"] == "http":
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with new_context():
             await self.app(scope, receive, send)
-        else:
-            with new_context():
-                await self.app(scope, receive, send)
 
 
 http_request_context = Context()
@@ -60,4 +123,5 @@ __all__: tuple[str, ...] = (
     "http_request_context",
     "ContextMiddleware",
     "RequestContextException",
+    "new_context",
 )
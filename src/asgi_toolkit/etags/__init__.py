@@ -1,10 +1,18 @@
+import hashlib
 from http import HTTPStatus
 from enum import Enum, auto
 from collections.abc import Callable, Sequence
 from dataclasses import dataclass, field
-from typing import TypeAlias
+from typing import Final, TypeAlias
 
-from asgi_toolkit.protocol import ASGIApp, Message, Receive, Scope, Send, HTTPResponseStartMessage
+from asgi_toolkit.protocol import (
+    ASGIApp,
+    HTTPResponseStartMessage,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
 
 
 class ConditionalEtagHeader(Enum):
@@ -16,10 +24,17 @@ Method: TypeAlias = str
 Path: TypeAlias = str
 ETagGenerator: TypeAlias = Callable[[bytes], str]
 
+_ETAG_HEADER_NAME: Final = b"ETag"
+
+
+def default_etag_generator(body: bytes) -> str:
+    """Generate an ETag from a 128-bit BLAKE2b digest of the response body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
 
 @dataclass(slots=True, frozen=True)
 class ETagConfig:
-    etag_generator: ETagGenerator
+    etag_generator: ETagGenerator = default_etag_generator
     ignore_paths: Sequence[tuple[Method, Path]] = field(default_factory=list)
 
 
@@ -29,6 +44,7 @@ class ETagMiddleware:
     __slots__ = (
         "app",
         "config",
+        "_ignore_paths",
     )
 
     def __init__(
@@ -44,27 +60,24 @@ class ETagMiddleware:
         """
         self.app = app
         self.config = config
+        self._ignore_paths = frozenset(config.ignore_paths)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if not scope["type"] == "http" or (scope["method"], scope["path"]) in self.config.ignore_paths:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) in self._ignore_paths:
             await self.app(scope, receive, send)
             return
 
         client_etag = None
         conditional_header = None
 
-        for header, value in scope["headers"]:
-            match header, value:
-                case (b"if-match", etag):
-                    conditional_header = ConditionalEtagHeader.IF_MATCH
-                    client_etag = etag.decode()
-                    break
-                case (b"if-none-match", etag):
-                    conditional_header = ConditionalEtagHeader.IF_NONE_MATCH
-                    client_etag = etag.decode()
-                    break
-                case _:
-                    continue
+        # If-Match takes precedence over If-None-Match (RFC 9110, section 13.2.2)
+        headers: dict[bytes, bytes] = dict(scope["headers"])
+        if (etag := headers.get(b"if-match")) is not None:
+            conditional_header = ConditionalEtagHeader.IF_MATCH
+            client_etag = etag.decode()
+        elif (etag := headers.get(b"if-none-match")) is not None:
+            conditional_header = ConditionalEtagHeader.IF_NONE_MATCH
+            client_etag = etag.decode()
 
         await self.app(
             scope,
@@ -79,7 +92,12 @@ class ETagMiddleware:
 
 
 class ETagSendWrapper:
-    """Wrapper for ASGI send callable that handles ETag processing."""
+    """Wrapper for ASGI send callable that handles ETag processing.
+
+    Responses sent as a single body message get an ETag and conditional request handling. Streamed
+    responses are forwarded chunk by chunk as they arrive and left without an ETag, since the header
+    would have to be sent before the body it describes is complete.
+    """
 
     __slots__: tuple[str, ...] = (
         "send",
@@ -87,6 +105,7 @@ class ETagSendWrapper:
         "conditional_header",
         "etag_generator",
         "original_message",
+        "_streaming",
     )
 
     def __init__(
@@ -102,19 +121,31 @@ class ETagSendWrapper:
         self.etag_generator = etag_generator
 
         self.original_message: HTTPResponseStartMessage | None = None
+        self._streaming = False
 
     def _is_modified(self, server_etag: str, client_etag: str | None) -> bool:
         return server_etag != client_etag
 
     async def __call__(self, message: Message) -> None:
+        if self._streaming:
+            await self.send(message)
+            return
+
         if message["type"] == "http.response.start":
-            self.original_message = message.copy()
+            self.original_message = message
             return
 
         if message["type"] == "http.response.body":
             assert self.original_message is not None, "_ETagSendWrapper called before http.response.start"
 
-            server_etag = self.etag_generator(message["body"])
+            if message.get("more_body", False):
+                self._streaming = True
+                await self.send(self.original_message)
+                await self.send(message)
+                return
+
+            server_etag = self.etag_generator(message.get("body", b""))
+            headers = self.original_message.get("headers", [])
 
             match self.conditional_header:
                 case ConditionalEtagHeader.IF_MATCH:
@@ -123,38 +154,30 @@ class ETagSendWrapper:
                             {
                                 "type": "http.response.start",
                                 "status": HTTPStatus.PRECONDITION_FAILED,
-                                "headers": self.original_message["headers"],
-                            }
-                        )
-                        await self.send(
-                            {
-                                "type": "http.response.body",
-                                "body": b"",
-                                "more_body": False,
+                                "headers": headers,
                             }
                         )
+                        await self.send({"type": "http.response.body", "body": b"", "more_body": False})
                         return
                 case ConditionalEtagHeader.IF_NONE_MATCH:
-                    print(server_etag, self.client_etag)
                     if not self._is_modified(server_etag, self.client_etag):
                         await self.send(
                             {
                                 "type": "http.response.start",
                                 "status": HTTPStatus.NOT_MODIFIED,
-                                "headers": self.original_message["headers"],
-                            }
-                        )
-                        await self.send(
-                            {
-                                "type": "http.response.body",
-                                "body": b"",
-                                "more_body": False,
+                                "headers": headers,
                             }
                         )
+                        await self.send({"type": "http.response.body", "body": b"", "more_body": False})
                         return
 
-            self.original_message["headers"].append(("ETag".encode(), server_etag.encode()))
-            await self.send(self.original_message)
+            # Only the header list is copied; the app's start message is left untouched
+            await self.send(
+                {
+                    **self.original_message,
+                    "headers": [*headers, (_ETAG_HEADER_NAME, server_etag.encode())],
+                }
+            )
 
             await self.send(message)
             return
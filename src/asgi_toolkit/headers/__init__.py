@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from http import HTTPStatus
 from typing import Any, TypeAlias
 
-from asgi_toolkit.context import http_request_context, new_context
+from asgi_toolkit.context import new_context
 from asgi_toolkit.protocol import ASGIApp, Receive, Scope, Send
 
 HeaderValidator: TypeAlias = Callable[[str], bool]
@@ -38,25 +38,27 @@ class HeadersConfig:
 class HeadersMiddleware:
     """ASGI middleware for extracting and validating HTTP headers."""
 
-    __slots__ = ("app", "config")
+    __slots__ = ("app", "config", "_rules")
 
     def __init__(self, app: ASGIApp, config: HeadersConfig) -> None:
         self.app = app
         self.config = config
+        self._rules = tuple((rule.name.lower().encode(), rule) for rule in config.rules)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
-        with new_context():
-            headers = {name.decode(): value.decode() for name, value in scope["headers"]}
+        # The context is set even without rules, so http_request_context stays usable downstream
+        with new_context() as context:
+            # ASGI header names are already lowercased, so only matched values need decoding
+            headers: dict[bytes, bytes] = dict(scope["headers"]) if self._rules else {}
 
-            for rule in self.config.rules:
-                header_key = rule.name.lower()
-                header_value = headers.get(header_key)
+            for header_key, rule in self._rules:
+                raw_value = headers.get(header_key)
 
-                if header_value is None:
+                if raw_value is None:
                     if rule.required:
                         await self._send_error_response(
                             send,
@@ -68,7 +70,9 @@ class HeadersMiddleware:
                     else:
                         continue
 
-                if header_value is not None and rule.validator:
+                header_value = raw_value.decode()
+
+                if rule.validator:
                     if not rule.validator(header_value):
                         await self._send_error_response(
                             send,
@@ -78,7 +82,7 @@ class HeadersMiddleware:
                         )
                         return
 
-                http_request_context[rule.name] = header_value
+                context[rule.name] = header_value
 
             await self.app(scope, receive, send)
 
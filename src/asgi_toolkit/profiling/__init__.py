@@ -1,5 +1,6 @@
 from asgi_toolkit.profiling.middleware import ProfilingMiddleware
 from asgi_toolkit.profiling.cprofile_profiler import CProfileProfiler
+from asgi_toolkit.profiling.pyinstrument_profiler import PyInstrumentProfiler
 from asgi_toolkit.profiling.types import (
     ReportOutput,
     ReportOutputFile,
@@ -12,6 +13,7 @@ from asgi_toolkit.profiling.config import ProfilingConfig
 __all__: tuple[str, ...] = (
     "ProfilingMiddleware",
     "CProfileProfiler",
+    "PyInstrumentProfiler",
     "Profiler",
     "ReportOutput",
     "ReportOutputFile",
@@ -1,22 +1,45 @@
 import cProfile
 import io
+import os
 import pstats
 
 from asgi_toolkit.profiling.types import Profiler
 
 
 class CProfileProfiler(Profiler):
-    def __init__(self) -> None:
+    """Deterministic profiler backed by cProfile.
+
+    Every function call is traced, which gives exact call counts but typically
+    slows profiled requests down by tens of percent. ``PyInstrumentProfiler``
+    is a lower-overhead sampling alternative.
+
+    Args:
+        top: Limit the text report to the given number of entries.
+    """
+
+    def __init__(self, top: int | None = None) -> None:
         self._profiler = cProfile.Profile()
+        self._top = top
+        self._report: str | None = None
 
     def start(self) -> None:
+        self._report = None
         self._profiler.enable()
 
     def stop(self) -> None:
         self._profiler.disable()
 
     def report(self) -> str:
-        s = io.StringIO()
-        ps = pstats.Stats(self._profiler, stream=s).sort_stats("cumulative")
-        ps.print_stats()
-        return s.getvalue()
+        if self._report is None:
+            s = io.StringIO()
+            ps = pstats.Stats(self._profiler, stream=s).sort_stats("cumulative")
+            if self._top is None:
+                ps.print_stats()
+            else:
+                ps.print_stats(self._top)
+            self._report = s.getvalue()
+        return self._report
+
+    def dump_stats(self, filepath: str | os.PathLike[str]) -> None:
+        """Write the raw marshalled stats to a file, skipping text report generation."""
+        self._profiler.dump_stats(filepath)
@@ -1,7 +1,9 @@
+import os
 from collections.abc import Awaitable, Callable
-from typing import cast
+from typing import Final, cast
 
 from asgi_toolkit.protocol import ASGIApp, Message, Scope, Receive, Send, HTTPRequestScope
+from asgi_toolkit.profiling.cprofile_profiler import CProfileProfiler
 from asgi_toolkit.profiling.types import (
     ReportOutputFile,
     ReportOutputLogger,
@@ -9,6 +11,13 @@ from asgi_toolkit.profiling.types import (
 )
 from asgi_toolkit.profiling.config import ProfilingConfig
 
+_RESPONSE_MESSAGE_TYPES: Final = frozenset({"http.response.start", "http.response.body"})
+_RAW_STATS_SUFFIX: Final = ".prof"
+
+
+def _is_raw_stats_path(filepath: str | os.PathLike[str]) -> bool:
+    return os.fspath(filepath).endswith(_RAW_STATS_SUFFIX)
+
 
 class ProfilingMiddleware:
     """
@@ -19,59 +28,65 @@ class ProfilingMiddleware:
         config: The profiling configuration.
     """
 
-    __slots__ = ("app", "config")
+    __slots__ = ("app", "config", "_query_param_needle", "_header_needle")
 
     def __init__(self, app: ASGIApp, config: ProfilingConfig) -> None:
         self.app = app
         self.config = config
 
+        self._query_param_needle: bytes | None = None
+        if config.activation_query_param:
+            self._query_param_needle = f"{config.activation_query_param}=true".encode()
+
+        self._header_needle: bytes | None = None
+        if config.activation_header:
+            self._header_needle = config.activation_header.lower().encode()
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        match scope["type"]:
-            case "http":
-                http_scope = cast(HTTPRequestScope, scope)
-
-                if self._is_profiling_active(http_scope):
-                    report = None
-                    original_send = send
-
-                    async def wrapped_send(message: Message) -> None:
-                        if isinstance(self.config.report_output, ReportOutputResponse):
-                            if message["type"] in ["http.response.start", "http.response.body"]:
-                                return
-                        await original_send(message)
-
-                    match self.config.report_output:
-                        case ReportOutputResponse():
-                            app_send: Callable[[Message], Awaitable[None]] = wrapped_send
-                        case _:
-                            app_send = original_send
-
-                    self.config.profiler.start()
-                    await self.app(scope, receive, app_send)
-                    self.config.profiler.stop()
-                    report = self.config.profiler.report()
-
-                    if report:
-                        await self._output_report(report, original_send)
-                else:
-                    await self.app(scope, receive, send)
-            case _:
-                await self.app(scope, receive, send)
+        if scope["type"] != "http" or not self._is_profiling_active(cast(HTTPRequestScope, scope)):
+            return await self.app(scope, receive, send)
+
+        original_send = send
+        app_send: Callable[[Message], Awaitable[None]] = original_send
+
+        if isinstance(self.config.report_output, ReportOutputResponse):
+            # The report replaces the app's response, so only non-response messages are forwarded
+            async def wrapped_send(message: Message) -> None:
+                if message["type"] in _RESPONSE_MESSAGE_TYPES:
+                    return
+                await original_send(message)
+
+            app_send = wrapped_send
+
+        self.config.profiler.start()
+        await self.app(scope, receive, app_send)
+        self.config.profiler.stop()
+
+        # cProfile can write raw stats for `.prof` files directly, without formatting a pstats report
+        match self.config.report_output, self.config.profiler:
+            case ReportOutputFile(filepath=filepath), CProfileProfiler() as profiler if _is_raw_stats_path(filepath):
+                profiler.dump_stats(filepath)
+                return
+
+        report = self.config.profiler.report()
+
+        if report:
+            await self._output_report(report, original_send)
 
     def _is_profiling_active(self, scope: HTTPRequestScope) -> bool:
-        if self.config.activation_query_param:
-            query_string = scope.get("query_string", b"").decode("utf-8")
-            if f"{self.config.activation_query_param}=true" in query_string:
-                return True
-        if self.config.activation_header:
-            headers = dict(scope.get("headers", []))
-            if self.config.activation_header.lower().encode("utf-8") in headers:
-                return True
+        if self._query_param_needle and self._query_param_needle in scope.get("query_string", b""):
+            return True
+        if self._header_needle:
+            header_needle = self._header_needle
+            for name, _ in scope.get("headers", ()):
+                if name == header_needle:
+                    return True
         return False
 
     async def _output_report(self, report: str, send: Send) -> None:
         match self.config.report_output:
             case ReportOutputFile(filepath=filepath):
+                # Opened per report, so rotated or replaced report files are always picked up
                 with open(filepath, "w") as f:
                     f.write(report)
             case ReportOutputLogger(logger=output_logger):
@@ -0,0 +1,33 @@
+from typing import Any
+
+from asgi_toolkit.profiling.types import Profiler
+
+
+class PyInstrumentProfiler(Profiler):
+    """Statistical profiler backed by pyinstrument.
+
+    Samples the call stack at a fixed interval instead of tracing every call,
+    so profiled requests run with only a few percent of overhead. Use
+    ``CProfileProfiler`` when exact call counts are required.
+
+    Requires the optional ``pyinstrument`` dependency.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        try:
+            from pyinstrument import Profiler as _PyInstrument
+        except ImportError as e:
+            raise ImportError(
+                "PyInstrumentProfiler requires pyinstrument - install it with `pip install asgi-toolkit[pyinstrument]`."
+            ) from e
+
+        self._profiler: Any = _PyInstrument(interval=interval, async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def report(self) -> str:
+        return self._profiler.output_text(unicode=True, color=False)
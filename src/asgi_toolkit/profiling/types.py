@@ -17,6 +17,12 @@ class Profiler(Protocol):
 
 @dataclass(slots=True, frozen=True)
 class ReportOutputFile:
+    """Writes the report to a file.
+
+    With ``CProfileProfiler``, a path ending in ``.prof`` receives the raw marshalled stats, readable with
+    ``pstats`` or tools like snakeviz, instead of the text report.
+    """
+
     filepath: Path
     type: Literal["file"] = "file"
 
@@ -4,29 +4,32 @@ This module defines all WebSocket-related ASGI protocol types including connecti
 messages, data transfer messages, and WebSocket-specific constants.
 """
 
-from typing import TypedDict, Literal, Required, NotRequired, TypeAlias
+from typing import TYPE_CHECKING, TypedDict, Literal, Required, NotRequired, TypeAlias
 from .extensions import ASGIExtensions
 from .http import HTTPVersion
 
 
 WebSocketScheme: TypeAlias = Literal["ws", "wss"]
-WebSocketCloseCode: TypeAlias = (
-    Literal[
-        1000,  # Normal Closure
-        1001,  # Going Away
-        1002,  # Protocol Error
-        1003,  # Unsupported Data
-        1005,  # No Status Received
-        1006,  # Abnormal Closure
-        1007,  # Invalid frame payload data
-        1008,  # Policy Violation
-        1009,  # Message Too Big
-        1010,  # Mandatory Extension
-        1011,  # Internal Server Error
-        1015,  # TLS handshake
-    ]
-    | int
-)  # Allow custom codes 3000-4999
+if TYPE_CHECKING:
+    WebSocketCloseCode: TypeAlias = (
+        Literal[
+            1000,  # Normal Closure
+            1001,  # Going Away
+            1002,  # Protocol Error
+            1003,  # Unsupported Data
+            1005,  # No Status Received
+            1006,  # Abnormal Closure
+            1007,  # Invalid frame payload data
+            1008,  # Policy Violation
+            1009,  # Message Too Big
+            1010,  # Mandatory Extension
+            1011,  # Internal Server Error
+            1015,  # TLS handshake
+        ]
+        | int
+    )  # Allow custom codes 3000-4999
+else:
+    WebSocketCloseCode = int
 
 
 class WebSocketScope(TypedDict):
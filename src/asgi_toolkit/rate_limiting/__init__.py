@@ -1,12 +1,18 @@
 """Rate limiting middleware package."""
 
-from asgi_toolkit.rate_limiting.backends import InMemoryBackend, RedisBackend
+from asgi_toolkit.rate_limiting.backends import (
+    InMemoryBackend,
+    RedisBackend,
+    SlidingWindowBackend,
+    TokenBucketBackend,
+)
 from asgi_toolkit.rate_limiting.config import PolicyConfig, RateLimitConfig
 from asgi_toolkit.rate_limiting.middleware import RateLimitingMiddleware
 from asgi_toolkit.rate_limiting.protocols import (
     Counter,
     IdentityExtractor,
     MetricsCollector,
+    PeekableIdentityExtractor,
     RateLimitingBackend,
     RateLimitResult,
 )
@@ -18,8 +24,11 @@ __all__: tuple[str, ...] = (
     "RateLimitingBackend",
     "InMemoryBackend",
     "RedisBackend",
+    "SlidingWindowBackend",
+    "TokenBucketBackend",
     "Counter",
     "MetricsCollector",
     "IdentityExtractor",
+    "PeekableIdentityExtractor",
     "RateLimitResult",
 )
@@ -1,5 +1,7 @@
 from asgi_toolkit.rate_limiting.backends.redis import RedisBackend
 from asgi_toolkit.rate_limiting.backends.inmemory import InMemoryBackend
+from asgi_toolkit.rate_limiting.backends.sliding_window import SlidingWindowBackend
+from asgi_toolkit.rate_limiting.backends.token_bucket import TokenBucketBackend
 
 
-__all__: tuple[str, ...] = ("RedisBackend", "InMemoryBackend")
+__all__: tuple[str, ...] = ("RedisBackend", "InMemoryBackend", "SlidingWindowBackend", "TokenBucketBackend")
@@ -1,44 +1,62 @@
+import heapq
 import time
+from collections.abc import Callable
+from dataclasses import dataclass
 
 from asgi_toolkit.rate_limiting.protocols import RateLimitingBackend, RateLimitResult
 
 
-class InMemoryBackend(RateLimitingBackend):
-    __slots__ = ("_counters",)
+@dataclass(slots=True)
+class _Entry:
+    """Hit count of a live window, bumped in place on every hit."""
 
-    def __init__(self) -> None:
-        self._counters: dict[tuple[str, int], dict[str, int]] = {}
+    count: int
+    window_start_time: int
 
-    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
-        current_time = int(time.time())
-        window_key = (key, window)
 
-        self._cleanup_expired_entries(current_time)
+class InMemoryBackend(RateLimitingBackend):
+    __slots__ = ("_counters", "_expirations", "_clock")
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initializes the in-memory rate limiting backend.
+
+        Args:
+            clock: Returns the current Unix time in seconds.
+        """
+        self._clock = clock
+        self._counters: dict[tuple[str, int], _Entry] = {}
+        # Min-heap of (expiry time, window key), one entry per live window
+        self._expirations: list[tuple[int, tuple[str, int]]] = []
 
-        if window_key in self._counters:
-            window_start_time = self._counters[window_key]["window_start_time"]
-            if current_time >= window_start_time + window:
-                del self._counters[window_key]
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        return self._hit(key, limit, window)
 
-        if window_key not in self._counters:
-            self._counters[window_key] = {"count": 0, "window_start_time": current_time}
+    def _hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        # Synchronous core: the in-memory path never awaits, so it can be reused without a coroutine
+        current_time = int(self._clock())
+        window_key = (key, window)
 
-        self._counters[window_key]["count"] += 1
+        expirations = self._expirations
+        if expirations and expirations[0][0] <= current_time:
+            self._cleanup_expired_entries(current_time)
 
-        count = self._counters[window_key]["count"]
-        window_start_time = self._counters[window_key]["window_start_time"]
+        entry = self._counters.get(window_key)
+        if entry is None:
+            entry = self._counters[window_key] = _Entry(1, current_time)
+            heapq.heappush(expirations, (current_time + window, window_key))
+        else:
+            entry.count += 1
 
+        count = entry.count
         allowed = count <= limit
         remaining = max(0, limit - count)
-        reset = window_start_time + window
+        reset = entry.window_start_time + window
 
         return RateLimitResult(allowed=allowed, remaining=remaining, reset=reset)
 
     def _cleanup_expired_entries(self, current_time: int) -> None:
-        expired_keys = [
-            window_key
-            for window_key, data in self._counters.items()
-            if current_time >= data["window_start_time"] + window_key[1]
-        ]
-        for key in expired_keys:
-            del self._counters[key]
+        # Only windows that have actually expired are touched, so this is O(k log n) for k expired windows
+        expirations = self._expirations
+        while expirations and expirations[0][0] <= current_time:
+            _, window_key = heapq.heappop(expirations)
+            del self._counters[window_key]
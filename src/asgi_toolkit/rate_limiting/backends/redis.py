@@ -1,8 +1,18 @@
 import time
-from typing import Protocol
+from typing import Any, Protocol
 
 from asgi_toolkit.rate_limiting.protocols import RateLimitingBackend, RateLimitResult
 
+# Increments the counter, starts the window on the first hit and returns (count, ttl in ms) in a single round trip.
+# Running it as one script also guarantees a counter can never be left without an expiry.
+_HIT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return {count, redis.call('PTTL', KEYS[1])}
+"""
+
 
 class RedisClientProtocol(Protocol):
     """Protocol for a Redis client with necessary rate limiting methods.
@@ -10,18 +20,15 @@ class RedisClientProtocol(Protocol):
     Defines the minimum interface required by the RedisBackend.
     """
 
-    async def incr(self, key: str) -> int:
-        """Increments the number stored at key by one."""
-
-    async def expire(self, key: str, seconds: int) -> bool:
-        """Set a timeout on key."""
+    async def script_load(self, script: str) -> str:
+        """Load a Lua script into the script cache and return its SHA1 digest."""
 
-    async def ttl(self, key: str) -> int:
-        """Get the time to live for a key."""
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args: Any) -> Any:
+        """Execute a cached Lua script by its SHA1 digest."""
 
 
 class RedisBackend(RateLimitingBackend):
-    __slots__ = ("_redis_client",)
+    __slots__ = ("_redis_client", "_script_sha")
 
     def __init__(self, redis_client: RedisClientProtocol) -> None:
         """Initializes the Redis rate limiting backend.
@@ -30,27 +37,38 @@ class RedisBackend(RateLimitingBackend):
             redis_client: The Redis client to use.
         """
         self._redis_client = redis_client
+        self._script_sha: str | None = None
 
     async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
-        current_time = int(time.time())
+        current_time = time.time()
         redis_key = f"rate_limit:{key}:{window}"
 
-        count = await self._redis_client.incr(redis_key)
+        count, ttl_ms = await self._run_hit_script(redis_key, window * 1000)
 
-        if count == 1:
-            await self._redis_client.expire(redis_key, window)
-
-        ttl = await self._redis_client.ttl(redis_key)
         # If ttl is -1, the key has no expiry. If ttl is -2, the key does not exist.
-        # In a rate limiting context, a key without expiry or a non-existent key
-        # after incr and expire would be unexpected if the logic is correct.
-        # However, to be safe, handle cases where ttl might be non-positive.
-        if ttl <= 0:
+        # The script sets the expiry atomically, so neither should happen, but stay safe.
+        if ttl_ms <= 0:
             reset = current_time + window
         else:
-            reset = current_time + ttl
+            reset = current_time + ttl_ms / 1000
 
         allowed = count <= limit
         remaining = max(0, limit - count)
 
         return RateLimitResult(allowed=allowed, remaining=remaining, reset=reset)
+
+    async def _run_hit_script(self, redis_key: str, window_ms: int) -> tuple[int, int]:
+        if self._script_sha is None:
+            self._script_sha = await self._redis_client.script_load(_HIT_SCRIPT)
+
+        try:
+            count, ttl = await self._redis_client.evalsha(self._script_sha, 1, redis_key, window_ms)
+        except Exception as e:
+            # The script cache is gone (server restart or SCRIPT FLUSH), load it again and retry once.
+            # redis-py raises NoScriptError; other clients surface the raw NOSCRIPT reply.
+            if type(e).__name__ != "NoScriptError" and "NOSCRIPT" not in str(e):
+                raise
+            self._script_sha = await self._redis_client.script_load(_HIT_SCRIPT)
+            count, ttl = await self._redis_client.evalsha(self._script_sha, 1, redis_key, window_ms)
+
+        return int(count), int(ttl)
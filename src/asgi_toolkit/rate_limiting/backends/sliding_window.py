@@ -0,0 +1,61 @@
+import time
+from collections import deque
+from collections.abc import Callable
+
+from asgi_toolkit.rate_limiting.protocols import RateLimitingBackend, RateLimitResult
+
+_CLEANUP_INTERVAL = 1024
+
+
+class SlidingWindowBackend(RateLimitingBackend):
+    """In-memory sliding window log rate limiting backend.
+
+    Keeps the timestamps of allowed hits per key and only admits a request when
+    fewer than `limit` of them fall within the last `window` seconds, so a client
+    can never exceed the limit in any window-sized interval.
+    """
+
+    __slots__ = ("_logs", "_hits_since_cleanup", "_clock")
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initializes the sliding window backend.
+
+        Args:
+            clock: Returns the current Unix time in seconds.
+        """
+        self._clock = clock
+        # (key, window) -> timestamps of allowed hits, oldest first
+        self._logs: dict[tuple[str, int], deque[float]] = {}
+        self._hits_since_cleanup = 0
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        return self._hit(key, limit, window)
+
+    def _hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = self._clock()
+        window_key = (key, window)
+
+        self._hits_since_cleanup += 1
+        if self._hits_since_cleanup >= _CLEANUP_INTERVAL:
+            self._cleanup_idle_logs(now)
+
+        log = self._logs.get(window_key)
+        if log is None:
+            log = self._logs[window_key] = deque()
+
+        cutoff = now - window
+        while log and log[0] <= cutoff:
+            log.popleft()
+
+        allowed = len(log) < limit
+        if allowed:
+            log.append(now)
+
+        return RateLimitResult(allowed=allowed, remaining=max(0, limit - len(log)), reset=log[0] + window)
+
+    def _cleanup_idle_logs(self, now: float) -> None:
+        # A log whose newest hit has left the window holds no live entries
+        self._hits_since_cleanup = 0
+        idle = [window_key for window_key, log in self._logs.items() if not log or log[-1] <= now - window_key[1]]
+        for window_key in idle:
+            del self._logs[window_key]
@@ -0,0 +1,76 @@
+import time
+from collections.abc import Callable
+
+from asgi_toolkit.rate_limiting.protocols import RateLimitingBackend, RateLimitResult
+
+_NS_PER_SECOND = 1_000_000_000
+_CLEANUP_INTERVAL = 1024
+
+
+class TokenBucketBackend(RateLimitingBackend):
+    """In-memory token bucket rate limiting backend.
+
+    Each key holds a bucket of up to `limit` tokens that refills continuously at
+    `limit` tokens per `window` seconds, so bursts across window boundaries are
+    bounded by the bucket size. Buckets are tracked with integer nanosecond math.
+    """
+
+    __slots__ = ("_buckets", "_hits_since_cleanup", "_clock")
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initializes the token bucket backend.
+
+        Args:
+            clock: Returns the current Unix time in seconds.
+        """
+        self._clock = clock
+        # (key, window) -> (tokens, last refill time in ns)
+        self._buckets: dict[tuple[str, int], tuple[int, int]] = {}
+        self._hits_since_cleanup = 0
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        return self._hit(key, limit, window)
+
+    def _hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = int(self._clock() * _NS_PER_SECOND)
+        window_ns = window * _NS_PER_SECOND
+        window_key = (key, window)
+
+        self._hits_since_cleanup += 1
+        if self._hits_since_cleanup >= _CLEANUP_INTERVAL:
+            self._cleanup_idle_buckets(now)
+
+        bucket = self._buckets.get(window_key)
+        if bucket is None:
+            tokens, last_refill = limit, now
+        else:
+            tokens, last_refill = bucket
+            elapsed = now - last_refill
+            if elapsed < 0:
+                # The wall clock stepped backwards; refill from now on instead of draining tokens
+                elapsed, last_refill = 0, now
+            refilled = elapsed * limit // window_ns
+            tokens += refilled
+            if tokens >= limit:
+                tokens, last_refill = limit, now
+            elif refilled:
+                last_refill += refilled * window_ns // limit
+
+        allowed = tokens > 0
+        if allowed:
+            tokens -= 1
+        self._buckets[window_key] = (tokens, last_refill)
+
+        full_at = last_refill + (limit - tokens) * window_ns // limit
+        return RateLimitResult(allowed=allowed, remaining=tokens, reset=full_at / _NS_PER_SECOND)
+
+    def _cleanup_idle_buckets(self, now: int) -> None:
+        # A bucket untouched for a whole window has refilled completely and is equivalent to a missing one
+        self._hits_since_cleanup = 0
+        idle = [
+            window_key
+            for window_key, (_, last_refill) in self._buckets.items()
+            if now - last_refill >= window_key[1] * _NS_PER_SECOND
+        ]
+        for window_key in idle:
+            del self._buckets[window_key]
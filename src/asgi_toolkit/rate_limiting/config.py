@@ -1,5 +1,6 @@
 """Configuration classes for rate limiting middleware."""
 
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 
 
@@ -17,8 +18,8 @@ class PolicyConfig:
             raise ValueError("window must be positive")
 
 
-MethodPolicyDict = dict[str, PolicyConfig]  # {"GET": PolicyConfig(100, 60)}
-RoutePolicyDict = dict[str, PolicyConfig | MethodPolicyDict]  # Route -> policy or method-specific policies
+MethodPolicyDict = Mapping[str, PolicyConfig]  # {"GET": PolicyConfig(100, 60)}
+RoutePolicyDict = Mapping[str, PolicyConfig | MethodPolicyDict]  # Route -> policy or method-specific policies
 
 
 @dataclass(slots=True, frozen=True)
@@ -43,3 +44,10 @@ class RateLimitConfig:
         match self.activation_header, self.activation_query_param:
             case None, None:
                 raise ValueError("At least one of [`activation_header`, `activation_query_param] must be set")
+
+        # Copy overrides so later mutation of the caller's mappings cannot change this config
+        copied_overrides = {
+            route: policy if isinstance(policy, PolicyConfig) else dict(policy)
+            for route, policy in self.policy_overrides.items()
+        }
+        object.__setattr__(self, "policy_overrides", copied_overrides)
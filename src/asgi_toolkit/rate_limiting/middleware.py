@@ -1,15 +1,34 @@
 """Rate limiting middleware implementation."""
 
+import inspect
 import time
+from collections.abc import Callable
 from logging import Logger
-from typing import cast
+from typing import Final, cast
 
 from asgi_toolkit.protocol import ASGIApp, HTTPRequestScope, Message, Receive, Scope, Send
 from asgi_toolkit.protocol.http import HTTPResponseStartMessage
 
 from asgi_toolkit.rate_limiting.config import RateLimitConfig
-from asgi_toolkit.rate_limiting.protocols import Counter, IdentityExtractor, MetricsCollector, RateLimitingBackend
-from asgi_toolkit.rate_limiting.utils import generate_rate_limit_key, get_rate_limit_policy, is_rate_limiting_activated
+from asgi_toolkit.rate_limiting.protocols import (
+    Counter,
+    IdentityExtractor,
+    MetricsCollector,
+    PeekableIdentityExtractor,
+    RateLimitingBackend,
+)
+from asgi_toolkit.rate_limiting.utils import (
+    compile_rate_limit_policies,
+    generate_rate_limit_key,
+    scan_rate_limit_activation,
+)
+
+_LIMIT_HEADER: Final = b"x-ratelimit-limit"
+_REMAINING_HEADER: Final = b"x-ratelimit-remaining"
+_RESET_HEADER: Final = b"x-ratelimit-reset"
+_RETRY_AFTER_HEADER: Final = b"retry-after"
+_CONTENT_TYPE: Final = (b"content-type", b"text/plain")
+_CONTENT_LENGTH: Final = (b"content-length", b"17")
 
 
 class RateLimitingMiddleware:
@@ -39,6 +58,21 @@ class RateLimitingMiddleware:
         self.metrics_collector = metrics_collector
         self.logger = logger
 
+        self._whitelist = frozenset(config.whitelist)
+        # Extractors that can resolve an identity straight from the scope implement a synchronous `peek`
+        self._peek_identity: Callable[[HTTPRequestScope], str | None] | None = None
+        if isinstance(identity_extractor, PeekableIdentityExtractor) and not inspect.iscoroutinefunction(
+            identity_extractor.peek
+        ):
+            self._peek_identity = identity_extractor.peek
+
+        self._activation_header = config.activation_header.lower().encode() if config.activation_header else None
+        self._activation_query_param = config.activation_query_param.encode() if config.activation_query_param else None
+
+        self._default_policy = (config.default_limit, config.default_window)
+        self._policies, self._wildcard_policies = compile_rate_limit_policies(config)
+        self._exact_routes = frozenset(route for route, _ in self._policies)
+
         self.rate_limited_requests: Counter | None = None
         self.total_requests: Counter | None = None
 
@@ -50,6 +84,24 @@ class RateLimitingMiddleware:
                 "total_requests", "Total number of requests processed by rate limiting middleware"
             )
 
+    def _resolve_policy(self, route: str, method: str) -> tuple[int, int]:
+        """Resolve the `(limit, window)` policy for a route and method."""
+        policies = self._policies
+        policy = policies.get((route, method)) or policies.get((route, None))
+        if policy is not None:
+            return policy
+        # An exact route without an override for this method uses the default; only other paths walk the trie
+        if self._wildcard_policies is None or route in self._exact_routes:
+            return self._default_policy
+        return self._wildcard_policies.match(route, method) or self._default_policy
+
+    def _prepare(self, scope: HTTPRequestScope, client_id: str) -> tuple[int, int, str]:
+        """Resolve the `(limit, window, key)` triple for a request in a single call."""
+        route = scope["path"]
+        method = scope["method"]
+        limit, window = self._resolve_policy(route, method)
+        return limit, window, generate_rate_limit_key(client_id, route, method)
+
     async def _send_rate_limit_response(
         self,
         scope: HTTPRequestScope,
@@ -61,16 +113,16 @@ class RateLimitingMiddleware:
     ) -> None:
         """Send a 429 Too Many Requests response."""
         headers = [
-            (b"content-type", b"text/plain"),
-            (b"content-length", b"17"),
-            (b"x-ratelimit-limit", str(limit).encode()),
-            (b"x-ratelimit-remaining", str(remaining).encode()),
-            (b"x-ratelimit-reset", str(reset).encode()),
+            _CONTENT_TYPE,
+            _CONTENT_LENGTH,
+            (_LIMIT_HEADER, b"%d" % limit),
+            (_REMAINING_HEADER, b"%d" % remaining),
+            (_RESET_HEADER, b"%d" % reset),
         ]
 
         if reset:
             retry_after = max(0, reset - int(time.time()))
-            headers.append((b"retry-after", str(retry_after).encode()))
+            headers.append((_RETRY_AFTER_HEADER, b"%d" % retry_after))
 
         await send(
             {
@@ -80,44 +132,35 @@ class RateLimitingMiddleware:
             }
         )
 
-        await send(
-            {
-                "type": "http.response.body",
-                "body": b"Too Many Requests",
-            }
-        )
+        await send({"type": "http.response.body", "body": b"Too Many Requests"})
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
-
-        if not is_rate_limiting_activated(scope, self.config):
-            await self.app(scope, receive, send)
-            return
+        if scope["type"] != "http" or not scan_rate_limit_activation(
+            scope, self._activation_header, self._activation_query_param
+        ):
+            return await self.app(scope, receive, send)
 
         if self.total_requests:
             self.total_requests.inc()
 
-        client_id = await self.identity_extractor(scope)
+        peek_identity = self._peek_identity
+        client_id = peek_identity(scope) if peek_identity is not None else None
+        if not isinstance(client_id, str):
+            client_id = await self.identity_extractor(scope)
 
-        if client_id in self.config.whitelist:
+        if client_id in self._whitelist:
             await self.app(scope, receive, send)
             return
 
-        route = scope["path"]
-        method = scope["method"]
-        limit, window = get_rate_limit_policy(route, method, self.config)
-
-        key = generate_rate_limit_key(client_id, route, method)
+        limit, window, key = self._prepare(scope, client_id)
         rate_limit_result = await self.backend.hit(key, limit, window)
 
         if not rate_limit_result.allowed:
             self.logger.warning(
                 "Rate limit exceeded for client %s on route %s %s. Limit: %d/%ds.",
                 client_id,
-                method,
-                route,
+                scope["method"],
+                scope["path"],
                 limit,
                 window,
             )
@@ -130,19 +173,18 @@ class RateLimitingMiddleware:
             )
             return
 
+        rate_limit_headers = (
+            (_LIMIT_HEADER, b"%d" % limit),
+            (_REMAINING_HEADER, b"%d" % rate_limit_result.remaining),
+            (_RESET_HEADER, b"%d" % round(rate_limit_result.reset)),
+        )
+
         async def send_with_headers(message: Message) -> None:
             if message["type"] == "http.response.start":
                 message = cast(HTTPResponseStartMessage, message)
 
-                headers = list(message.get("headers", []))
-                headers.extend(
-                    [
-                        (b"x-ratelimit-limit", str(limit).encode()),
-                        (b"x-ratelimit-remaining", str(rate_limit_result.remaining).encode()),
-                        (b"x-ratelimit-reset", str(rate_limit_result.reset).encode()),
-                    ]
-                )
-                message["headers"] = headers
+                # A new list is always built, since apps may reuse one header list across responses
+                message["headers"] = [*(message.get("headers") or ()), *rate_limit_headers]
 
             await send(message)
 
@@ -1,6 +1,6 @@
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Protocol, runtime_checkable
 
 from asgi_toolkit.protocol import HTTPRequestScope
 
@@ -23,15 +23,18 @@ class RateLimitResult:
     def __post_init__(self) -> None:
         """
         Validate the result attributes.
+
+        Validation is skipped when Python runs with -O, since results are built once per request.
         """
-        if not isinstance(self.allowed, bool):
-            raise TypeError("'allowed' must be a boolean")
-        if not isinstance(self.remaining, int):
-            raise TypeError("'remaining' must be an integer")
-        if self.remaining < 0:
-            raise ValueError("'remaining' must be non-negative")
-        if not isinstance(self.reset, (int, float)):
-            raise TypeError("'reset' must be a number")
+        if __debug__:
+            if not isinstance(self.allowed, bool):
+                raise TypeError("'allowed' must be a boolean")
+            if not isinstance(self.remaining, int):
+                raise TypeError("'remaining' must be an integer")
+            if self.remaining < 0:
+                raise ValueError("'remaining' must be non-negative")
+            if not isinstance(self.reset, (int, float)):
+                raise TypeError("'reset' must be a number")
 
 
 class RateLimitingBackend(Protocol):
@@ -63,3 +66,14 @@ class MetricsCollector(Protocol):
 
 
 IdentityExtractor = Callable[[HTTPRequestScope], Awaitable[str]]
+
+
+@runtime_checkable
+class PeekableIdentityExtractor(Protocol):
+    def peek(self, scope: HTTPRequestScope) -> str | None:
+        """
+        Resolves the client identity synchronously from the scope.
+
+        Returns:
+            The client identity, or None when it can only be resolved by awaiting the extractor.
+        """
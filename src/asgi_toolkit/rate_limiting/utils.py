@@ -1,62 +1,160 @@
 """Utility functions for rate limiting."""
 
-from urllib.parse import parse_qs
+from collections.abc import Mapping
+from types import MappingProxyType
+from urllib.parse import parse_qsl
 
 from asgi_toolkit.protocol import HTTPRequestScope
 
 from asgi_toolkit.rate_limiting.config import PolicyConfig, RateLimitConfig
 
+_KEY_ESCAPE_TABLE = str.maketrans({":": "_"})
+
 
 def is_rate_limiting_activated(scope: HTTPRequestScope, config: RateLimitConfig) -> bool:
     """Check if rate limiting is activated for this request."""
-    headers: dict[bytes, bytes] = dict(scope["headers"])
-    query_string = scope["query_string"].decode()
-    query_params = parse_qs(query_string)
-
+    return scan_rate_limit_activation(
+        scope,
+        config.activation_header.lower().encode() if config.activation_header else None,
+        config.activation_query_param.encode() if config.activation_query_param else None,
+    )
+
+
+def scan_rate_limit_activation(
+    scope: HTTPRequestScope,
+    activation_header: bytes | None,
+    activation_query_param: bytes | None,
+) -> bool:
+    """Check if rate limiting is activated for this request, matching on raw header and query bytes.
+
+    Args:
+        scope: HTTP request scope
+        activation_header: Lowercased, encoded name of the activation header
+        activation_query_param: Encoded name of the activation query parameter
+    """
     is_active = False
 
-    if config.activation_header:
-        header_name = config.activation_header.lower().encode()
-        if header_name in headers:
-            header_value = headers[header_name].decode().lower()
-            if header_value != "off":
+    if activation_header:
+        for name, value in scope["headers"]:
+            if name == activation_header:
+                if value.lower() == b"off":
+                    return False
                 is_active = True
-            else:
-                return False
+                break
 
-    if config.activation_query_param:
-        param_name = config.activation_query_param
-        if param_name in query_params:
-            param_value = query_params[param_name][0].lower()
-            if param_value != "off":
-                is_active = True
-            else:
+    if activation_query_param:
+        param_value = _find_query_param(scope["query_string"], activation_query_param)
+        if param_value is not None:
+            if param_value.lower() == b"off":
                 return False
+            is_active = True
 
     return is_active
 
 
-def get_rate_limit_policy(route: str, method: str, config: RateLimitConfig) -> tuple[int, int]:
-    """Get rate limiting policy for the given route and method."""
-    if not config.policy_overrides or route not in config.policy_overrides:
-        return config.default_limit, config.default_window
+def _find_query_param(query_string: bytes, name: bytes) -> bytes | None:
+    """Return the first non-empty value of a query parameter, or None when it is absent."""
+    if b"%" in query_string:
+        # Percent-encoded query strings are rare, so only they pay for the stdlib parser
+        for pair_name, value in parse_qsl(query_string):
+            if pair_name == name:
+                return value
+        return None
+
+    # A substring check rejects the common case of an absent parameter without splitting the query string
+    if name not in query_string:
+        return None
+    for pair in query_string.split(b"&"):
+        pair_name, _, value = pair.partition(b"=")
+        if pair_name == name and value:
+            return value
+    return None
+
 
-    route_policy = config.policy_overrides[route]
+def _is_wildcard_segment(segment: str) -> bool:
+    return segment == "*" or (segment.startswith("{") and segment.endswith("}"))
 
-    match route_policy:
-        case PolicyConfig():
-            return route_policy.limit, route_policy.window
-        case dict() if method in route_policy:
-            method_policy = route_policy[method]
-            return method_policy.limit, method_policy.window
-        case _:
-            return config.default_limit, config.default_window
+
+class PolicyTrie:
+    """Path-segment trie resolving policy overrides for routes with wildcard segments.
+
+    A `*` or `{param}` segment matches any single non-empty path segment. Literal segments take
+    precedence over wildcards, so lookups cost O(path segments) regardless of the number of rules.
+    """
+
+    __slots__ = ("_children", "_policies", "_wildcard")
+
+    def __init__(self) -> None:
+        self._children: dict[str, PolicyTrie] = {}
+        self._wildcard: PolicyTrie | None = None
+        # method -> (limit, window); None holds the route-wide policy
+        self._policies: dict[str | None, tuple[int, int]] = {}
+
+    def insert(self, route: str, method: str | None, policy: tuple[int, int]) -> None:
+        node = self
+        for segment in route.split("/"):
+            if _is_wildcard_segment(segment):
+                if node._wildcard is None:
+                    node._wildcard = PolicyTrie()
+                node = node._wildcard
+            else:
+                node = node._children.setdefault(segment, PolicyTrie())
+        node._policies[method] = policy
+
+    def match(self, path: str, method: str) -> tuple[int, int] | None:
+        """Return the `(limit, window)` of the most specific rule matching the path and method."""
+        return self._match(path.split("/"), 0, method)
+
+    def _match(self, segments: list[str], index: int, method: str) -> tuple[int, int] | None:
+        if index == len(segments):
+            return self._policies.get(method) or self._policies.get(None)
+
+        segment = segments[index]
+        child = self._children.get(segment)
+        if child is not None and (policy := child._match(segments, index + 1, method)) is not None:
+            return policy
+        if self._wildcard is not None and segment:
+            return self._wildcard._match(segments, index + 1, method)
+        return None
+
+
+def compile_rate_limit_policies(
+    config: RateLimitConfig,
+) -> tuple[Mapping[tuple[str, str | None], tuple[int, int]], PolicyTrie | None]:
+    """Flatten policy overrides into lookup tables.
+
+    Returns:
+        A read-only mapping of `(route, method) -> (limit, window)` for exact routes, with route-wide overrides
+        stored under `(route, None)`, and a `PolicyTrie` of wildcard routes, or None when there are none.
+    """
+    policies: dict[tuple[str, str | None], tuple[int, int]] = {}
+    wildcard_policies: PolicyTrie | None = None
+
+    for route, route_policy in config.policy_overrides.items():
+        match route_policy:
+            case PolicyConfig():
+                entries: list[tuple[str | None, PolicyConfig]] = [(None, route_policy)]
+            case Mapping():
+                entries = list(route_policy.items())
+            case _:
+                raise TypeError(
+                    f"Policy override for {route!r} must be a PolicyConfig or a mapping of methods to PolicyConfig, "
+                    f"got {type(route_policy).__name__}"
+                )
+
+        if any(_is_wildcard_segment(segment) for segment in route.split("/")):
+            if wildcard_policies is None:
+                wildcard_policies = PolicyTrie()
+            for method, policy in entries:
+                wildcard_policies.insert(route, method, (policy.limit, policy.window))
+        else:
+            for method, policy in entries:
+                policies[(route, method)] = (policy.limit, policy.window)
+
+    return MappingProxyType(policies), wildcard_policies
 
 
 def generate_rate_limit_key(client_id: str, route: str, method: str) -> str:
     """Generate a normalized key for rate limiting."""
-
-    safe_client_id = client_id.replace(":", "_")
-    safe_route = route.replace(":", "_")
-    safe_method = method.replace(":", "_")
-    return f"ratelimit:{safe_client_id}:{safe_route}:{safe_method}"
+    # HTTP methods are tokens, which cannot contain ":", so only the client id and route need escaping
+    return f"ratelimit:{client_id.translate(_KEY_ESCAPE_TABLE)}:{route.translate(_KEY_ESCAPE_TABLE)}:{method}"
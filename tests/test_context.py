@@ -1,8 +1,8 @@
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
-from fastapi.testclient import TestClient as FastAPITestClient
+from httpx import ASGITransport, AsyncClient
 from litestar import Litestar, get
-from litestar.testing import TestClient as LitestarTestClient
 from typing import Any
 
 from asgi_toolkit.context import (
@@ -12,10 +12,12 @@ from asgi_toolkit.context import (
     new_context,
 )
 
+# Keep each framework's tests on one xdist worker so module-scoped clients are built once per worker
+FRAMEWORKS = [pytest.param(name, marks=pytest.mark.xdist_group(name)) for name in ("fastapi", "litestar")]
 
-def assert_context_value(key: str, expected_value: str):
+
+def assert_getitem_equals(key: str, expected_value: str):
     assert http_request_context[key] == expected_value
-    assert http_request_context.get(key) == expected_value
 
 
 def assert_context_empty():
@@ -36,44 +38,83 @@ class TestContextBasicOperations:
         with pytest.raises(RequestContextException, match="No request context available"):
             http_request_context["key"] = "value"
 
+    def test_context_exception_message(self):
+        with pytest.raises(RequestContextException) as exc_info:
+            _ = http_request_context["key"]
+
+        error_message = str(exc_info.value)
+        assert "No request context available" in error_message
+        assert "ContextMiddleware" in error_message
+        assert "add_middleware" in error_message
+
     def test_context_with_new_context_manager(self):
+        with new_context():
+            ctx = http_request_context
+            ctx["key"] = "value"
+            assert_getitem_equals("key", "value")
+            assert ctx.get("missing", "default") == "default"
+
+    def test_context_get_method(self):
         with new_context():
             http_request_context["key"] = "value"
-            assert_context_value("key", "value")
-            assert http_request_context.get("missing", "default") == "default"
+            assert http_request_context.get("key") == "value"
+            assert http_request_context.get("missing") is None
 
     def test_context_dict_operations(self):
         with new_context():
-            http_request_context["key"] = "value"
-            assert_context_value("key", "value")
+            ctx = http_request_context
+            ctx["key"] = "value"
+            assert_getitem_equals("key", "value")
 
-            assert "key" in http_request_context
-            assert "missing" not in http_request_context
+            assert "key" in ctx
+            assert "missing" not in ctx
 
-            assert http_request_context.get("missing", "default") == "default"
+            assert ctx.get("missing", "default") == "default"
 
-            result = http_request_context.setdefault("new_key", "new_value")
+            result = ctx.setdefault("new_key", "new_value")
             assert result == "new_value"
-            assert http_request_context["new_key"] == "new_value"
+            assert ctx["new_key"] == "new_value"
 
-            http_request_context["another"] = "another_value"
-            assert set(http_request_context.keys()) == {"key", "new_key", "another"}
-            assert "value" in http_request_context.values()
-            assert ("key", "value") in http_request_context.items()
+            ctx["another"] = "another_value"
+            assert set(ctx.keys()) == {"key", "new_key", "another"}
+            assert "value" in ctx.values()
+            assert ("key", "value") in ctx.items()
 
-            assert len(http_request_context) == 3
-            http_request_context.clear()
+            assert len(ctx) == 3
+            ctx.clear()
             assert_context_empty()
 
+    def test_context_delete_and_iteration(self):
+        with new_context():
+            http_request_context["key"] = "value"
+            http_request_context["other"] = "other_value"
+            assert dict(http_request_context) == {"key": "value", "other": "other_value"}
+            assert list(http_request_context) == ["key", "other"]
+
+            snapshot = http_request_context.as_dict()
+            assert snapshot == {"key": "value", "other": "other_value"}
 
+            del http_request_context["key"]
+            assert "key" not in http_request_context
+            assert "key" in snapshot
+            with pytest.raises(KeyError):
+                _ = http_request_context["key"]
+
+
+request_counter = {"count": 0}
+
+
+@pytest.mark.asyncio(loop_scope="module")
 class TestContextMiddleware:
-    @pytest.fixture(params=["fastapi", "litestar"])
-    def client(self, request):
-        request_counter = {"count": 0}
+    @pytest.fixture(autouse=True)
+    def reset_request_counter(self):
+        request_counter["count"] = 0
 
+    @pytest_asyncio.fixture(scope="module", loop_scope="module", params=FRAMEWORKS)
+    async def client(self, request):
         match request.param:
             case "fastapi":
-                app = FastAPI()
+                app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
 
                 @app.get("/")
                 def read_root():
@@ -95,7 +136,6 @@ class TestContextMiddleware:
                     }
 
                 app.add_middleware(ContextMiddleware)
-                client = FastAPITestClient(app)
             case "litestar":
 
                 @get("/", sync_to_thread=False)
@@ -117,41 +157,45 @@ class TestContextMiddleware:
                         "value": http_request_context.get("value"),
                     }
 
-                app = Litestar(route_handlers=[read_root, set_value, get_value], middleware=[ContextMiddleware])
-                client = LitestarTestClient(app)
-        return client
-
-    def test_context_middleware_basic_functionality(self, client):
-        response = client.get("/")
+                app = Litestar(
+                    route_handlers=[read_root, set_value, get_value],
+                    middleware=[ContextMiddleware],
+                    openapi_config=None,
+                    logging_config=None,
+                    debug=False,
+                )
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+            yield client
+
+    async def test_context_middleware_basic_functionality(self, client):
+        response = await client.get("/")
         assert_response_success(response, {"value": "test_value"})
 
-    def test_context_isolation_between_requests(self, client):
-        response1 = client.get("/set/first")
+    async def test_context_isolation_between_requests(self, client):
+        response1 = await client.get("/set/first")
         assert_response_success(response1, {"request_id": 1, "value": "first"})
 
-        response2 = client.get("/set/second")
+        response2 = await client.get("/set/second")
         assert_response_success(response2, {"request_id": 2, "value": "second"})
 
-        response3 = client.get("/get")
+        response3 = await client.get("/get")
         assert_response_success(response3, {"request_id": None, "value": None})
 
-    def test_context_exception_message(self):
-        with pytest.raises(RequestContextException) as exc_info:
-            _ = http_request_context["key"]
-
-        error_message = str(exc_info.value)
-        assert "No request context available" in error_message
-        assert "ContextMiddleware" in error_message
-        assert "add_middleware" in error_message
-
 
 class TestNewContextManager:
     def test_new_context_cleanup(self):
         with pytest.raises(ValueError):
             with new_context():
-                http_request_context["key"] = "value"
-                assert_context_value("key", "value")
+                ctx = http_request_context
+                ctx["key"] = "value"
+                assert_getitem_equals("key", "value")
                 raise ValueError("test error")
 
         with pytest.raises(RequestContextException):
             _ = http_request_context["key"]
+
+    def test_new_context_returns_context_dict(self):
+        with new_context() as context:
+            context["key"] = "value"
+            assert_getitem_equals("key", "value")
+            assert http_request_context.as_dict() == {"key": "value"}
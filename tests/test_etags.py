@@ -1,63 +1,74 @@
 import hashlib
 from litestar.middleware.base import DefineMiddleware
 import pytest
-from fastapi import FastAPI
-from fastapi.testclient import TestClient as FastAPITestClient
-from litestar import Litestar, get
-from litestar.testing import TestClient as LitestarTestClient
+import pytest_asyncio
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+from litestar import Litestar, Response as LitestarResponse, get
 
-from asgi_toolkit.etags import ETagConfig, ETagMiddleware
+from asgi_toolkit.etags import ETagConfig, ETagMiddleware, default_etag_generator
 
 
 def simple_etag_generator(body: bytes) -> str:
-    return hashlib.md5(body).hexdigest()
+    # Keyed and shorter than the default digest, so a middleware ignoring etag_generator fails the ETag checks
+    return hashlib.blake2b(body, digest_size=8, key=b"asgi-toolkit-tests").hexdigest()
 
 
-@pytest.fixture(params=["fastapi", "litestar"])
-def client(request):
+EXPECTED_BODY = b'{"message":"hello world"}'
+HEALTH_BODY = b'{"status":"ok"}'
+EXPECTED_ETAG = "ebe05e2d145a332f"
+
+# Keep each framework's tests on one xdist worker so module-scoped clients are built once per worker
+FRAMEWORKS = [pytest.param(name, marks=pytest.mark.xdist_group(name)) for name in ("fastapi", "litestar")]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module", params=FRAMEWORKS)
+async def client(request):
     config = ETagConfig(etag_generator=simple_etag_generator, ignore_paths=[("GET", "/health")])
 
     match request.param:
         case "fastapi":
-            app = FastAPI()
+            app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
 
             @app.get("/")
             def read_root():
-                return {"message": "hello world"}
+                return Response(content=EXPECTED_BODY, media_type="application/json")
 
             @app.get("/health")
             def health_check():
-                return {"status": "ok"}
+                return Response(content=HEALTH_BODY, media_type="application/json")
 
             ignore_paths = [("GET", "/health")]
             app.add_middleware(ETagMiddleware, config=config)
-            client = FastAPITestClient(app)
         case "litestar":
 
             @get("/", sync_to_thread=False)
-            def read_root() -> dict:
-                return {"message": "hello world"}
+            def read_root() -> LitestarResponse[bytes]:
+                return LitestarResponse(content=EXPECTED_BODY, media_type="application/json")
 
             @get("/health", sync_to_thread=False)
-            def health_check() -> dict:
-                return {"status": "ok"}
+            def health_check() -> LitestarResponse[bytes]:
+                return LitestarResponse(content=HEALTH_BODY, media_type="application/json")
 
             ignore_paths = [("GET", "/health")]
             app = Litestar(
                 route_handlers=[read_root, health_check],
                 middleware=[DefineMiddleware(ETagMiddleware, config=config)],
+                openapi_config=None,
+                logging_config=None,
+                debug=False,
             )
-            client = LitestarTestClient(app)
-    return client
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
 
 
-@pytest.fixture(params=["fastapi", "litestar"])
-def client_with_counter(request):
+@pytest_asyncio.fixture(scope="module", loop_scope="module", params=FRAMEWORKS)
+async def client_with_counter(request):
     counter = {"value": 0}
     config = ETagConfig(etag_generator=simple_etag_generator)
 
     if request.param == "fastapi":
-        app = FastAPI()
+        app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
 
         @app.get("/")
         def read_root():
@@ -65,7 +76,6 @@ def client_with_counter(request):
             return {"message": f"hello world {counter['value']}"}
 
         app.add_middleware(ETagMiddleware, config=config)
-        client = FastAPITestClient(app)
     else:  # litestar
 
         @get("/", sync_to_thread=False)
@@ -73,9 +83,15 @@ def client_with_counter(request):
             counter["value"] += 1
             return {"message": f"hello world {counter['value']}"}
 
-        app = Litestar(route_handlers=[read_root], middleware=[DefineMiddleware(ETagMiddleware, config=config)])
-        client = LitestarTestClient(app)
-    return client
+        app = Litestar(
+            route_handlers=[read_root],
+            middleware=[DefineMiddleware(ETagMiddleware, config=config)],
+            openapi_config=None,
+            logging_config=None,
+            debug=False,
+        )
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
 
 
 def assert_response_success(response, expected_status: int = 200):
@@ -102,52 +118,125 @@ def assert_precondition_failed_response(response):
     assert response.content == b""
 
 
+@pytest.mark.asyncio(loop_scope="module")
 class TestETagMiddleware:
-    def test_etag_generation(self, client):
-        response = client.get("/")
+    async def test_etag_generation(self, client):
+        response = await client.get("/")
         assert_response_success(response)
-        expected_etag = hashlib.md5(response.content).hexdigest()
-        assert_etag_present(response, expected_etag)
-
-    def test_if_none_match_not_modified(self, client):
-        response = client.get("/")
-        etag = response.headers["etag"]
+        assert response.content == EXPECTED_BODY
+        assert_etag_present(response, EXPECTED_ETAG)
 
-        response = client.get("/", headers={"If-None-Match": etag})
+    async def test_if_none_match_not_modified(self, client):
+        response = await client.get("/", headers={"If-None-Match": EXPECTED_ETAG})
         assert_not_modified_response(response)
 
-    def test_if_none_match_modified(self, client):
+    async def test_if_none_match_modified(self, client):
         etag = "mumbo-jumbo"
 
-        response = client.get("/", headers={"If-None-Match": etag})
+        response = await client.get("/", headers={"If-None-Match": etag})
         assert_response_success(response)
         assert_etag_present(response)
         assert response.headers["etag"] != etag
 
-    def test_if_match_precondition_failed(self, client_with_counter):
-        response = client_with_counter.get("/")
+    async def test_if_match_precondition_failed(self, client_with_counter):
+        response = await client_with_counter.get("/")
         etag = response.headers["etag"]
 
-        response = client_with_counter.get("/", headers={"If-Match": etag})
+        response = await client_with_counter.get("/", headers={"If-Match": etag})
         assert_precondition_failed_response(response)
 
-    def test_if_match_success(self, client):
-        response = client.get("/")
-        etag = response.headers["etag"]
-
-        response = client.get("/", headers={"If-Match": etag})
+    async def test_if_match_success(self, client):
+        response = await client.get("/", headers={"If-Match": EXPECTED_ETAG})
         assert_response_success(response)
         assert_etag_present(response)
 
-    def test_ignore_paths(self, client):
-        response = client.get("/")
+    async def test_if_match_takes_precedence_over_if_none_match(self, client):
+        response = await client.get("/", headers={"If-None-Match": EXPECTED_ETAG, "If-Match": "mumbo-jumbo"})
+        assert_precondition_failed_response(response)
+
+    async def test_ignore_paths(self, client):
+        response = await client.get("/")
         assert_response_success(response)
         assert_etag_present(response)
 
-        response = client.get("/health")
+        response = await client.get("/health")
+        assert_response_success(response)
+        assert_etag_absent(response)
+
+    async def test_non_http_requests_passthrough(self, client):
+        response = await client.get("/")
+        assert_response_success(response)
+
+
+class TestDefaultETagGenerator:
+    async def test_default_generator_used_when_not_configured(self):
+        app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+        @app.get("/")
+        def read_root():
+            return {"message": "hello world"}
+
+        app.add_middleware(ETagMiddleware, config=ETagConfig())
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+            response = await client.get("/")
+        assert_response_success(response)
+        assert_etag_present(response, default_etag_generator(response.content))
+
+    def test_default_generator_is_stable(self):
+        assert default_etag_generator(b"hello") == hashlib.blake2b(b"hello", digest_size=16).hexdigest()
+        assert default_etag_generator(b"hello") != default_etag_generator(b"world")
+
+
+class TestStreamedBodies:
+    @pytest.fixture(params=[None, simple_etag_generator], ids=["default", "custom"])
+    async def streaming_client(self, request):
+        from fastapi.responses import StreamingResponse
+
+        config = ETagConfig() if request.param is None else ETagConfig(etag_generator=request.param)
+        app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(iter([b"hello ", b"streamed ", b"world"]), media_type="text/plain")
+
+        app.add_middleware(ETagMiddleware, config=config)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+            yield client, config.etag_generator
+
+    async def test_streamed_body_passed_through_without_etag(self, streaming_client):
+        client, _ = streaming_client
+
+        response = await client.get("/stream")
         assert_response_success(response)
+        assert response.content == b"hello streamed world"
         assert_etag_absent(response)
 
-    def test_non_http_requests_passthrough(self, client):
-        response = client.get("/")
+    async def test_streamed_body_skips_conditional_handling(self, streaming_client):
+        client, etag_generator = streaming_client
+
+        response = await client.get("/stream", headers={"If-None-Match": etag_generator(b"hello streamed world")})
         assert_response_success(response)
+        assert response.content == b"hello streamed world"
+
+    async def test_first_chunk_sent_before_last_is_produced(self):
+        sent: list[dict] = []
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"first", "more_body": True})
+            assert [message.get("body") for message in sent] == [None, b"first"]
+            await send({"type": "http.response.body", "body": b"last", "more_body": False})
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = ETagMiddleware(app, config=ETagConfig())
+        await middleware({"type": "http", "method": "GET", "path": "/", "headers": []}, None, send)
+
+        assert [message["type"] for message in sent] == [
+            "http.response.start",
+            "http.response.body",
+            "http.response.body",
+        ]
+        assert sent[-1]["body"] == b"last"
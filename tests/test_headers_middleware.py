@@ -1,83 +1,117 @@
 import pytest
+import pytest_asyncio
+from contextlib import AsyncExitStack
 from http import HTTPStatus
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 
 from fastapi import FastAPI
-from fastapi.testclient import TestClient as FastAPITestClient
+from httpx import ASGITransport, AsyncClient
 from litestar import Litestar, get
-from litestar.testing import TestClient as LitestarTestClient
 from litestar.middleware import DefineMiddleware
 from asgi_toolkit.context import http_request_context
 from asgi_toolkit.headers import HeadersMiddleware, HeadersConfig, HeaderRule
 
 
-def is_numeric(value: str) -> bool:
-    return value.isdigit()
-
-
 def always_invalid(_value: str) -> bool:
     return False
 
 
-@pytest.fixture(params=["fastapi", "litestar"])
-def create_client(request: pytest.FixtureRequest) -> Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient]:
-    def factory(config: HeadersConfig) -> FastAPITestClient | LitestarTestClient:
-        if request.param == "fastapi":
-            fastapi_app: FastAPI = FastAPI()
+# Keep each framework's tests on one xdist worker so module-scoped clients are built once per worker
+FRAMEWORKS = [pytest.param(name, marks=pytest.mark.xdist_group(name)) for name in ("fastapi", "litestar")]
 
-            @fastapi_app.get("/")
-            def read_headers() -> dict[str, Any]:
-                return dict(http_request_context)
+CONFIGS: dict[str, HeadersConfig] = {
+    "single": HeadersConfig(rules=[HeaderRule("X-Test-Header")]),
+    "pair": HeadersConfig(rules=[HeaderRule("X-Header-1"), HeaderRule("X-Header-2")]),
+    "optional": HeadersConfig(rules=[HeaderRule("X-Optional-Header", required=False)]),
+    "required": HeadersConfig(rules=[HeaderRule("X-Required-Header", required=True)]),
+    "required_unauthorized": HeadersConfig(
+        rules=[HeaderRule("X-Required-Header", required=True, error_status_missing=HTTPStatus.UNAUTHORIZED)]
+    ),
+    "factory": HeadersConfig(rules=[HeaderRule("X-Factory-Header", required=True)]),
+    "numeric": HeadersConfig(rules=[HeaderRule("X-Numeric-Header", validator=str.isdigit)]),
+    "case": HeadersConfig(rules=[HeaderRule("X-Case-Header")]),
+    "missing_custom_status": HeadersConfig(
+        rules=[HeaderRule("X-Missing-Custom-Status", required=True, error_status_missing=HTTPStatus.UNAUTHORIZED)]
+    ),
+    "invalid_custom_status": HeadersConfig(
+        rules=[
+            HeaderRule(
+                "X-Invalid-Custom-Status",
+                validator="valid".__eq__,
+                error_status_invalid=HTTPStatus.FORBIDDEN,
+            )
+        ]
+    ),
+}
 
-            fastapi_app.add_middleware(HeadersMiddleware, config=config)
-            client: FastAPITestClient | LitestarTestClient = FastAPITestClient(fastapi_app)
-        else:  # litestar
 
-            @get("/")
-            async def read_headers() -> dict[str, Any]:
-                return dict(http_request_context)
+def build_client(framework: str, config: HeadersConfig) -> AsyncClient:
+    app: FastAPI | Litestar
+    if framework == "fastapi":
+        app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
 
-            litestar_app = Litestar(
-                route_handlers=[read_headers],
-                middleware=[DefineMiddleware(HeadersMiddleware, config=config)],
-            )
-            client = LitestarTestClient(litestar_app)
+        @app.get("/")
+        def read_headers() -> dict[str, Any]:
+            return http_request_context.as_dict()
+
+        app.add_middleware(HeadersMiddleware, config=config)
+    else:  # litestar
+
+        @get("/")
+        async def read_headers() -> dict[str, Any]:
+            return http_request_context.as_dict()
 
-        return client
+        app = Litestar(
+            route_handlers=[read_headers],
+            middleware=[DefineMiddleware(HeadersMiddleware, config=config)],
+            openapi_config=None,
+            logging_config=None,
+            debug=False,
+        )
 
-    return factory
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
 
 
+@pytest_asyncio.fixture(scope="module", loop_scope="module", params=FRAMEWORKS)
+async def create_client(request: pytest.FixtureRequest) -> AsyncIterator[Callable[[str], AsyncClient]]:
+    clients: dict[str, AsyncClient] = {}
+
+    async with AsyncExitStack() as stack:
+
+        def factory(config_key: str) -> AsyncClient:
+            if config_key not in clients:
+                clients[config_key] = build_client(request.param, CONFIGS[config_key])
+                stack.push_async_callback(clients[config_key].aclose)
+            return clients[config_key]
+
+        yield factory
+
+
+@pytest.mark.asyncio(loop_scope="module")
 class TestHeadersMiddleware:
     @pytest.mark.parametrize(
-        "header_config,request_headers,expected_response",
+        "config_key,request_headers,expected_response",
         [
-            ({"X-Test-Header": {}}, {"X-Test-Header": "test_value"}, {"X-Test-Header": "test_value"}),
+            ("single", {"X-Test-Header": "test_value"}, {"X-Test-Header": "test_value"}),
             (
-                {"X-Header-1": {}, "X-Header-2": {}},
+                "pair",
                 {"X-Header-1": "value1", "X-Header-2": "value2"},
                 {"X-Header-1": "value1", "X-Header-2": "value2"},
             ),
-            ({"X-Optional-Header": {"required": False}}, {}, {}),
-            (
-                {"X-Required-Header": {"required": True}},
-                {"X-Required-Header": "present_value"},
-                {"X-Required-Header": "present_value"},
-            ),
+            ("optional", {}, {}),
+            ("required", {"X-Required-Header": "present_value"}, {"X-Required-Header": "present_value"}),
         ],
     )
-    def test_successful_header_processing(
+    async def test_successful_header_processing(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
-        header_config: dict[str, Any],
+        create_client: Callable[[str], AsyncClient],
+        config_key: str,
         request_headers: dict[str, str],
         expected_response: dict[str, str],
     ) -> None:
-        rules = [HeaderRule(name=name, **opts) for name, opts in header_config.items()]
-        config = HeadersConfig(rules=rules)
-        client = create_client(config)
+        client = create_client(config_key)
 
-        response = client.get("/", headers=request_headers)
+        response = await client.get("/", headers=request_headers)
 
         assert response.status_code == 200
         assert response.json() == expected_response
@@ -93,37 +127,33 @@ class TestHeadersMiddleware:
             ({"X-Factory-Header": "factory_value"}, HTTPStatus.OK, {"X-Factory-Header": "factory_value"}),
         ],
     )
-    def test_headers_middleware_factory(
+    async def test_headers_middleware_factory(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
+        create_client: Callable[[str], AsyncClient],
         headers: dict[str, str],
         expected_status: HTTPStatus,
         expected_data: dict[str, Any],
     ) -> None:
-        config = HeadersConfig(rules=[HeaderRule("X-Factory-Header", required=True)])
-        client = create_client(config)
+        client = create_client("factory")
 
-        response = client.get("/", headers=headers)
+        response = await client.get("/", headers=headers)
         assert response.status_code == expected_status
         assert response.json() == expected_data
 
-    @pytest.mark.parametrize("custom_status", [None, HTTPStatus.UNAUTHORIZED])
-    def test_missing_required_header(
+    @pytest.mark.parametrize(
+        "config_key,expected_status",
+        [("required", HTTPStatus.BAD_REQUEST), ("required_unauthorized", HTTPStatus.UNAUTHORIZED)],
+    )
+    async def test_missing_required_header(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
-        custom_status: HTTPStatus | None,
+        create_client: Callable[[str], AsyncClient],
+        config_key: str,
+        expected_status: HTTPStatus,
     ) -> None:
-        header_opts: dict[str, Any] = {"required": True}
-        if custom_status:
-            header_opts["error_status_missing"] = custom_status
-
-        rules = [HeaderRule("X-Required-Header", **header_opts)]
-        config = HeadersConfig(rules=rules)
-        client = create_client(config)
+        client = create_client(config_key)
 
-        response = client.get("/")
+        response = await client.get("/")
 
-        expected_status = custom_status or HTTPStatus.BAD_REQUEST
         expected_data = {
             "error": "Required header 'X-Required-Header' is missing",
             "header": "X-Required-Header",
@@ -138,17 +168,15 @@ class TestHeadersMiddleware:
             ("abc", False),
         ],
     )
-    def test_header_with_validator(
+    async def test_header_with_validator(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
+        create_client: Callable[[str], AsyncClient],
         header_value: str,
         is_valid: bool,
     ) -> None:
-        rules = [HeaderRule("X-Numeric-Header", validator=is_numeric)]
-        config = HeadersConfig(rules=rules)
-        client = create_client(config)
+        client = create_client("numeric")
 
-        response = client.get("/", headers={"X-Numeric-Header": header_value})
+        response = await client.get("/", headers={"X-Numeric-Header": header_value})
 
         if is_valid:
             assert response.status_code == 200
@@ -167,33 +195,29 @@ class TestHeadersMiddleware:
             ("X-CASE-HEADER", "X-Case-Header"),
         ],
     )
-    def test_case_insensitive_headers(
+    async def test_case_insensitive_headers(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
+        create_client: Callable[[str], AsyncClient],
         sent_header: str,
         expected_key: str,
     ) -> None:
-        rules = [HeaderRule("X-Case-Header")]
-        config = HeadersConfig(rules=rules)
-        client = create_client(config)
+        client = create_client("case")
 
-        response = client.get("/", headers={sent_header: "case_value"})
+        response = await client.get("/", headers={sent_header: "case_value"})
         assert response.status_code == 200
         assert response.json() == {expected_key: "case_value"}
 
     @pytest.mark.parametrize(
-        "header_name,header_config,request_headers,expected_status,expected_error",
+        "config_key,request_headers,expected_status,expected_error",
         [
             (
-                "X-Missing-Custom-Status",
-                {"required": True, "error_status_missing": HTTPStatus.UNAUTHORIZED},
+                "missing_custom_status",
                 {},
                 HTTPStatus.UNAUTHORIZED,
                 {"error": "Required header 'X-Missing-Custom-Status' is missing", "header": "X-Missing-Custom-Status"},
             ),
             (
-                "X-Invalid-Custom-Status",
-                {"validator": lambda v: v == "valid", "error_status_invalid": HTTPStatus.FORBIDDEN},
+                "invalid_custom_status",
                 {"X-Invalid-Custom-Status": "invalid"},
                 HTTPStatus.FORBIDDEN,
                 {
@@ -203,19 +227,39 @@ class TestHeadersMiddleware:
             ),
         ],
     )
-    def test_custom_status_codes(
+    async def test_custom_status_codes(
         self,
-        create_client: Callable[[HeadersConfig], FastAPITestClient | LitestarTestClient],
-        header_name: str,
-        header_config: dict[str, Any],
+        create_client: Callable[[str], AsyncClient],
+        config_key: str,
         request_headers: dict[str, str],
         expected_status: HTTPStatus,
         expected_error: dict[str, Any],
     ) -> None:
-        rules = [HeaderRule(header_name, **header_config)]
-        config = HeadersConfig(rules=rules)
-        client = create_client(config)
+        client = create_client(config_key)
 
-        response = client.get("/", headers=request_headers)
+        response = await client.get("/", headers=request_headers)
         assert response.status_code == expected_status
         assert response.json() == expected_error
+
+
+class TestHeadersMiddlewareWithoutRules:
+    async def test_empty_context_set_without_rules(self) -> None:
+        called = False
+
+        async def app(scope: Any, receive: Any, send: Any) -> None:
+            nonlocal called
+            called = True
+            assert dict(http_request_context) == {}
+
+        middleware = HeadersMiddleware(app, config=HeadersConfig())
+
+        async def receive() -> Any:
+            return {"type": "http.request"}
+
+        async def send(message: Any) -> None:
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"x-test-header", b"value")]}
+        await middleware(scope, receive, send)
+
+        assert called
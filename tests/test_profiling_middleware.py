@@ -1,18 +1,22 @@
 import pytest
+import itertools
 import logging
 import os
-import tempfile
-import asyncio
+import pstats
+import sys
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient as FastAPITestClient
+from httpx import ASGITransport, AsyncClient
 
 from litestar import Litestar, get
 from litestar.testing import TestClient as LitestarTestClient
 from litestar.middleware import DefineMiddleware
 
 from asgi_toolkit.profiling import (
+    CProfileProfiler,
     ProfilingMiddleware,
+    PyInstrumentProfiler,
     Profiler,
     ReportOutputFile,
     ReportOutputLogger,
@@ -23,9 +27,7 @@ from asgi_toolkit.profiling import (
 
 class MockManualProfiler(Profiler):
     def __init__(self):
-        self.started = False
-        self.stopped = False
-        self._report_content = "Manual Profiler Report"
+        self.reset()
 
     def start(self) -> None:
         self.started = True
@@ -36,10 +38,24 @@ class MockManualProfiler(Profiler):
     def report(self) -> str:
         return self._report_content
 
+    def reset(self) -> "MockManualProfiler":
+        self.started = False
+        self.stopped = False
+        self._report_content = "Manual Profiler Report"
+        return self
+
+
+# Profilers are recycled across tests, so repeated runs start from identical state without allocating
+_PROFILER_POOL = itertools.cycle([MockManualProfiler() for _ in range(4)])
+
+
+def checkout_profiler() -> MockManualProfiler:
+    return next(_PROFILER_POOL).reset()
+
 
 def create_client(framework, activation_method, report_output, profiler=None):
     if profiler is None:
-        profiler = MockManualProfiler()
+        profiler = checkout_profiler()
 
     config_kwargs = {
         "profiler": profiler,
@@ -53,6 +69,13 @@ def create_client(framework, activation_method, report_output, profiler=None):
 
     profiling_config = ProfilingConfig(**config_kwargs)
 
+    client = AsyncClient(
+        transport=ASGITransport(app=build_app(framework, profiling_config)), base_url="http://testserver"
+    )
+    return client, profiler
+
+
+def build_app(framework, profiling_config):
     if framework == "fastapi":
         app = FastAPI()
 
@@ -61,18 +84,59 @@ def create_client(framework, activation_method, report_output, profiler=None):
             return {"Hello": "world"}
 
         app.add_middleware(ProfilingMiddleware, config=profiling_config)
-        return FastAPITestClient(app), profiler
+        return app
     else:  # litestar
 
         @get("/")
         async def read_root() -> dict[str, str]:
             return {"Hello": "world"}
 
-        app = Litestar(
+        return Litestar(
             route_handlers=[read_root],
             middleware=[DefineMiddleware(ProfilingMiddleware, config=profiling_config)],
         )
-        return LitestarTestClient(app), profiler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def report_logger():
+    # Records go straight to a handler on the report logger, bypassing the root logger and caplog's filtering
+    test_logger = logging.getLogger("test_logger")
+    handler = ListHandler()
+    level, propagate = test_logger.level, test_logger.propagate
+    test_logger.addHandler(handler)
+    test_logger.setLevel(logging.INFO)
+    test_logger.propagate = False
+    yield test_logger, handler
+    test_logger.removeHandler(handler)
+    test_logger.setLevel(level)
+    test_logger.propagate = propagate
+
+
+@pytest.fixture(scope="session")
+def report_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("reports")
+
+
+def first_profiled_run() -> int:
+    return sum(range(100))
+
+
+def second_profiled_run() -> int:
+    return max(range(100))
+
+
+def report_rows(report: str) -> list[str]:
+    # Function rows follow the pstats column header line
+    return [row for row in report.split("filename:lineno(function)", 1)[1].splitlines() if row.strip()]
 
 
 def assert_profiler_state(profiler: MockManualProfiler, should_be_active: bool):
@@ -95,8 +159,8 @@ def assert_file_output(filepath: str, profiler: Profiler):
         assert f.read() == profiler.report(), "File should contain profiler report"
 
 
-def assert_logger_output(caplog, profiler: Profiler, logger_name: str = "test_logger"):
-    log_messages = [record.message for record in caplog.records if record.name == logger_name]
+def assert_logger_output(records: list[logging.LogRecord], profiler: Profiler):
+    log_messages = [record.getMessage() for record in records]
     assert any("Profiling Report:" in msg for msg in log_messages), "Log should contain 'Profiling Report:'"
     assert any(profiler.report() in msg for msg in log_messages), "Log should contain profiler report"
 
@@ -111,74 +175,162 @@ class TestProfilingMiddleware:
             ("litestar", "header", "/"),
         ],
     )
-    def test_profiling_response_output(self, framework, activation_method, activation_value):
+    async def test_profiling_response_output(self, framework, activation_method, activation_value):
         report_output = ReportOutputResponse(type="response")
         client, profiler = create_client(framework, activation_method, report_output)
 
-        if activation_method == "query":
-            response = client.get(activation_value)
-        else:
-            response = client.get(activation_value, headers={"X-Profile": "true"})
+        async with client:
+            if activation_method == "query":
+                response = await client.get(activation_value)
+            else:
+                response = await client.get(activation_value, headers={"X-Profile": "true"})
 
         assert_profiler_state(profiler, True)
         assert_response_output(response, profiler)
 
-    @pytest.mark.parametrize(
-        "framework,activation_method",
-        [
-            ("fastapi", "query"),
-            ("fastapi", "header"),
-            ("litestar", "query"),
-            ("litestar", "header"),
-        ],
-    )
-    def test_profiling_file_output(self, framework, activation_method):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            filepath = os.path.join(tmpdir, "report.txt")
-            report_output = ReportOutputFile(filepath=filepath)
-            client, profiler = create_client(framework, activation_method, report_output)
+    # Both frameworks are covered by test_profiling_response_output, so file output only needs one
+    @pytest.mark.parametrize("activation_method", ["query", "header"])
+    async def test_profiling_file_output(self, activation_method, report_dir):
+        filepath = os.path.join(report_dir, f"report-{activation_method}.txt")
+        report_output = ReportOutputFile(filepath=filepath)
+        client, profiler = create_client("fastapi", activation_method, report_output)
 
+        async with client:
             if activation_method == "query":
-                response = client.get("/?profile=true")
+                response = await client.get("/?profile=true")
             else:
-                response = client.get("/", headers={"X-Profile": "true"})
+                response = await client.get("/", headers={"X-Profile": "true"})
+
+        assert response.status_code == 200
+        assert_profiler_state(profiler, True)
+        assert_file_output(filepath, profiler)
+
+    async def test_file_output_follows_replaced_report_file(self, report_dir):
+        filepath = os.path.join(report_dir, "report-replaced.txt")
+        profiler = MockManualProfiler()
+        config = ProfilingConfig(
+            profiler=profiler,
+            report_output=ReportOutputFile(filepath=filepath),
+            activation_query_param="profile",
+        )
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = ProfilingMiddleware(app, config=config)
+
+        async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://testserver") as client:
+            await client.get("/?profile=true")
+            os.remove(filepath)
+            profiler._report_content = "short"
+            await client.get("/?profile=true")
+
+        assert_file_output(filepath, profiler)
+
+    async def test_cprofile_file_output_writes_raw_stats(self, report_dir):
+        filepath = os.path.join(report_dir, "report.prof")
+        report_output = ReportOutputFile(filepath=filepath)
+        client, _ = create_client("fastapi", "query", report_output, profiler=CProfileProfiler())
+
+        async with client:
+            response = await client.get("/?profile=true")
+
+        assert response.status_code == 200
+        assert pstats.Stats(filepath).total_calls > 0
+
+    async def test_cprofile_file_output_writes_text_report_for_other_paths(self, report_dir):
+        filepath = os.path.join(report_dir, "report-cprofile.txt")
+        profiler = CProfileProfiler()
+        client, _ = create_client("fastapi", "query", ReportOutputFile(filepath=filepath), profiler=profiler)
+
+        async with client:
+            response = await client.get("/?profile=true")
 
-            assert response.status_code == 200
-            assert_profiler_state(profiler, True)
-            assert_file_output(filepath, profiler)
+        assert response.status_code == 200
+        assert_file_output(filepath, profiler)
 
     @pytest.mark.parametrize(
         "activation_method",
         ["query", "header"],
     )
-    def test_profiling_logger_output(self, activation_method, caplog):
-        test_logger = logging.getLogger("test_logger")
+    async def test_profiling_logger_output(self, activation_method, report_logger):
+        test_logger, handler = report_logger
         report_output = ReportOutputLogger(logger=test_logger)
         client, profiler = create_client("fastapi", activation_method, report_output)
 
-        with caplog.at_level(logging.INFO):
+        async with client:
             if activation_method == "query":
-                response = client.get("/?profile=true")
+                response = await client.get("/?profile=true")
             else:
-                response = client.get("/", headers={"X-Profile": "true"})
+                response = await client.get("/", headers={"X-Profile": "true"})
 
         assert response.status_code == 200
         assert_profiler_state(profiler, True)
-        assert_logger_output(caplog, profiler)
+        assert_logger_output(handler.records, profiler)
 
     @pytest.mark.parametrize("framework", ["fastapi", "litestar"])
-    def test_profiling_not_activated(self, framework):
+    async def test_profiling_not_activated(self, framework):
         report_output = ReportOutputResponse(type="response")
         client, profiler = create_client(framework, "query", report_output)
 
-        response = client.get("/")
+        async with client:
+            response = await client.get("/")
 
         assert response.status_code == 200
         assert_profiler_state(profiler, False)
         assert response.json() == {"Hello": "world"}
 
-    def test_profiling_skipped_for_websocket_scope(self):
-        profiler = MockManualProfiler()
+    def test_fastapi_test_client_smoke(self):
+        profiler = checkout_profiler()
+        profiling_config = ProfilingConfig(
+            profiler=profiler,
+            report_output=ReportOutputResponse(type="response"),
+            activation_query_param="profile",
+        )
+
+        with FastAPITestClient(build_app("fastapi", profiling_config)) as client:
+            response = client.get("/?profile=true")
+
+        assert_profiler_state(profiler, True)
+        assert_response_output(response, profiler)
+
+    def test_litestar_test_client_smoke(self):
+        profiler = checkout_profiler()
+        profiling_config = ProfilingConfig(
+            profiler=profiler,
+            report_output=ReportOutputResponse(type="response"),
+            activation_query_param="profile",
+        )
+
+        with LitestarTestClient(build_app("litestar", profiling_config)) as client:
+            response = client.get("/?profile=true")
+
+        assert_profiler_state(profiler, True)
+        assert_response_output(response, profiler)
+
+    async def test_minimal_http_scope_without_optional_keys(self):
+        forwarded = []
+
+        async def app(scope, receive, send):
+            forwarded.append(scope["type"])
+
+        profiler = checkout_profiler()
+        config = ProfilingConfig(
+            profiler=profiler,
+            report_output=ReportOutputResponse(type="response"),
+            activation_query_param="profile",
+            activation_header="X-Profile",
+        )
+        middleware = ProfilingMiddleware(app, config=config)
+
+        await middleware({"type": "http", "method": "GET", "path": "/"}, None, None)
+
+        assert forwarded == ["http"]
+        assert_profiler_state(profiler, False)
+
+    async def test_profiling_skipped_for_websocket_scope(self):
+        profiler = checkout_profiler()
 
         async def dummy_websocket_app(scope, receive, send):
             pass
@@ -214,6 +366,80 @@ class TestProfilingMiddleware:
             config=config,
         )
 
-        asyncio.run(middleware(websocket_scope, websocket_receive, websocket_send))
+        await middleware(websocket_scope, websocket_receive, websocket_send)
 
         assert_profiler_state(profiler, False)
+
+    async def test_websocket_scope_touches_no_http_state(self):
+        class Untouchable:
+            def __getattr__(self, name):
+                raise AttributeError(f"{name!r} accessed on the non-HTTP path")
+
+        forwarded = []
+
+        async def app(scope, receive, send):
+            forwarded.append(scope["type"])
+
+        config = ProfilingConfig(
+            profiler=checkout_profiler(),
+            report_output=ReportOutputResponse(type="response"),
+            activation_query_param="profile",
+        )
+        middleware = ProfilingMiddleware(app, config=config)
+        middleware.config = Untouchable()
+        middleware._query_param_needle = Untouchable()
+        middleware._header_needle = Untouchable()
+
+        await middleware({"type": "websocket"}, None, None)
+
+        assert forwarded == ["websocket"]
+
+
+class TestCProfileProfiler:
+    def test_top_limits_listed_functions(self):
+        limited, unlimited = CProfileProfiler(top=2), CProfileProfiler()
+        for profiler in (limited, unlimited):
+            profiler.start()
+            first_profiled_run()
+            second_profiled_run()
+            profiler.stop()
+
+        assert len(report_rows(limited.report())) == 2
+        assert len(report_rows(unlimited.report())) > 2
+
+    def test_report_reflects_latest_run(self):
+        profiler = CProfileProfiler()
+
+        profiler.start()
+        first_profiled_run()
+        profiler.stop()
+        first_report = profiler.report()
+        assert "first_profiled_run" in first_report
+        assert "second_profiled_run" not in first_report
+        assert profiler.report() is first_report
+
+        profiler.start()
+        second_profiled_run()
+        profiler.stop()
+        assert "second_profiled_run" in profiler.report()
+
+
+class TestPyInstrumentProfiler:
+    async def test_response_output(self):
+        pytest.importorskip("pyinstrument")
+        profiler = PyInstrumentProfiler()
+        client, _ = create_client("fastapi", "query", ReportOutputResponse(type="response"), profiler=profiler)
+
+        async with client:
+            response = await client.get("/?profile=true")
+
+        assert response.status_code == 200
+        assert response.text.strip()
+        assert response.text == profiler.report()
+
+    def test_missing_dependency_raises_import_error(self, monkeypatch):
+        # A None entry in sys.modules makes `import pyinstrument` raise ImportError
+        monkeypatch.setitem(sys.modules, "pyinstrument", None)
+
+        with pytest.raises(ImportError, match=r"asgi-toolkit\[pyinstrument\]"):
+            PyInstrumentProfiler()
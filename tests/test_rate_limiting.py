@@ -1,9 +1,13 @@
 import pytest
+import copy
+import dataclasses
 import logging
-from unittest.mock import MagicMock, patch
+import pickle
+from unittest.mock import AsyncMock
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient as FastAPITestClient
+from httpx import ASGITransport, AsyncClient
 from litestar import Litestar, get
 from litestar.testing import TestClient as LitestarTestClient
 from litestar.status_codes import HTTP_429_TOO_MANY_REQUESTS
@@ -16,11 +20,20 @@ from asgi_toolkit.rate_limiting import (
     MetricsCollector,
     Counter,
     InMemoryBackend,
+    SlidingWindowBackend,
+    TokenBucketBackend,
     RateLimitResult,
 )
+from asgi_toolkit.rate_limiting.utils import PolicyTrie, compile_rate_limit_policies, is_rate_limiting_activated
 from asgi_toolkit.protocol import HTTPRequestScope
 
 
+# A real logger that drops records, so log calls cost what they would in production
+null_logger = logging.getLogger("tests.rate_limiting")
+null_logger.addHandler(logging.NullHandler())
+null_logger.propagate = False
+
+
 class MockRateLimitingBackend(RateLimitingBackend):
     def __init__(self, allowed=True, remaining=5, reset=100) -> None:
         self._allowed = allowed
@@ -59,82 +72,50 @@ class MockCounter(Counter):
 class MockMetricsCollector(MetricsCollector):
     def __init__(self) -> None:
         self.counters: dict[str, MockCounter] = {}
+        self.calls: list[str] = []
 
     def counter(self, name: str, description: str) -> Counter:
+        self.calls.append(name)
         if name not in self.counters:
             self.counters[name] = MockCounter()
         return self.counters[name]
 
 
-@pytest.fixture(params=["fastapi", "litestar"])
-def client(request):
-    mock_backend = MockRateLimitingBackend()
-    mock_identity_extractor = MockIdentityExtractor()
-    mock_logger = MagicMock(spec=logging.Logger)
-    mock_metrics_collector = MockMetricsCollector()
+def minimal_asgi(body: bytes = b'{"message":"Hello, world!"}'):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
 
-    # Handle parametrized test cases that pass additional config
-    if isinstance(request.param, tuple):
-        framework, extra_config = request.param
-        whitelist = extra_config.get("whitelist", set())
-        policy_overrides = extra_config.get("policy_overrides", {})
-    else:
-        framework = request.param
-        whitelist = set()
-        policy_overrides = {}
 
+def build_middleware(app, **config_overrides):
     config = RateLimitConfig(
         activation_header="X-RateLimit-Activate",
         activation_query_param="ratelimit",
-        whitelist=whitelist,
-        policy_overrides=policy_overrides,
+        **config_overrides,
     )
+    return RateLimitingMiddleware(
+        app=app,
+        config=config,
+        backend=MockRateLimitingBackend(),
+        identity_extractor=MockIdentityExtractor(),
+        logger=null_logger,
+        metrics_collector=MockMetricsCollector(),
+    )
+
+
+@pytest.fixture
+async def client(request):
+    # Only the middleware's ASGI behavior is under test, so it wraps a bare ASGI app instead of a framework
+    middleware = build_middleware(minimal_asgi(), **getattr(request, "param", {}))
 
-    match framework:
-        case "fastapi":
-            app = FastAPI()
-
-            @app.get("/")
-            async def read_root():
-                return {"message": "Hello, world!"}
-
-            middleware = RateLimitingMiddleware(
-                app=app,
-                config=config,
-                backend=mock_backend,
-                identity_extractor=mock_identity_extractor,
-                logger=mock_logger,
-                metrics_collector=mock_metrics_collector,
-            )
-            test_client = FastAPITestClient(middleware)
-            test_client.middleware = middleware
-            test_client.mock_backend = mock_backend
-            test_client.mock_identity_extractor = mock_identity_extractor
-            test_client.mock_logger = mock_logger
-            test_client.mock_metrics_collector = mock_metrics_collector
-            return test_client
-        case "litestar":
-
-            @get("/")
-            async def read_root() -> dict[str, str]:
-                return {"message": "Hello, world!"}
-
-            app = Litestar(route_handlers=[read_root])
-            middleware = RateLimitingMiddleware(
-                app=app,
-                config=config,
-                backend=mock_backend,
-                identity_extractor=mock_identity_extractor,
-                logger=mock_logger,
-                metrics_collector=mock_metrics_collector,
-            )
-            test_client = LitestarTestClient(middleware)
-            test_client.middleware = middleware
-            test_client.mock_backend = mock_backend
-            test_client.mock_identity_extractor = mock_identity_extractor
-            test_client.mock_logger = mock_logger
-            test_client.mock_metrics_collector = mock_metrics_collector
-            return test_client
+    async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://testserver") as test_client:
+        test_client.middleware = middleware
+        test_client.mock_backend = middleware.backend
+        test_client.mock_identity_extractor = middleware.identity_extractor
+        test_client.mock_metrics_collector = middleware.metrics_collector
+        yield test_client
 
 
 def assert_response_success(response, expected_data: dict):
@@ -160,21 +141,28 @@ def assert_metrics_count(mock_metrics_collector, metric_name: str, expected_coun
 
 
 class TestRateLimitingMiddleware:
-    def test_request_allowed(self, client):
+    async def test_request_allowed(self, client):
         client.mock_backend._allowed = True
-        response = client.get("/", headers={"X-RateLimit-Activate": "true"})
+        response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
 
         assert_response_success(response, {"message": "Hello, world!"})
         assert_backend_hits(client.mock_backend, 1)
         assert client.mock_backend.hits[0].allowed is True
         assert client.mock_backend.last_key.startswith("ratelimit:test_client")
 
-    def test_request_denied(self, client):
+    async def test_rate_limit_headers_added(self, client):
+        response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert response.headers["x-ratelimit-limit"] == "100"
+        assert response.headers["x-ratelimit-remaining"] == "5"
+        assert response.headers["x-ratelimit-reset"] == "100"
+
+    async def test_request_denied(self, client):
         client.mock_backend._allowed = False
         client.mock_backend._remaining = 0
         client.mock_backend._reset = 200
 
-        response = client.get("/", headers={"X-RateLimit-Activate": "true"})
+        response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
         assert_rate_limited_response(response)
         assert_metrics_count(client.mock_metrics_collector, "rate_limited_requests", 1)
 
@@ -183,23 +171,25 @@ class TestRateLimitingMiddleware:
         [
             ("header", {"X-RateLimit-Activate": "true"}),
             ("query", "/?ratelimit=true"),
+            ("query", "/?foo=bar&ratelimit=true"),
+            ("query", "/?rate%6Cimit=true"),
         ],
     )
-    def test_activation_methods(
+    async def test_activation_methods(
         self,
         client,
         activation_method,
         activation_value,
     ):
         if activation_method == "header":
-            client.get("/", headers=activation_value)
+            await client.get("/", headers=activation_value)
         else:
-            client.get(activation_value)
+            await client.get(activation_value)
 
         assert_backend_hits(client.mock_backend, 1)
 
-    def test_not_activated_by_default(self, client):
-        client.get("/")
+    async def test_not_activated_by_default(self, client):
+        await client.get("/")
 
         assert_backend_hits(client.mock_backend, 0)
 
@@ -207,75 +197,165 @@ class TestRateLimitingMiddleware:
         "deactivation_method,deactivation_value",
         [
             ("header", {"X-RateLimit-Activate": "off"}),
+            ("header", {"X-RateLimit-Activate": "OFF"}),
             ("query", "/?ratelimit=off"),
+            ("query", "/?ratelimit="),
+            ("query", "/?ratelimit=%6Fff&ratelimit=true"),
         ],
     )
-    def test_deactivation_methods(
+    async def test_deactivation_methods(
         self,
         client,
         deactivation_method,
         deactivation_value,
     ):
         if deactivation_method == "header":
-            client.get("/", headers=deactivation_value)
+            await client.get("/", headers=deactivation_value)
         else:
-            client.get(deactivation_value)
+            await client.get(deactivation_value)
 
         assert_backend_hits(client.mock_backend, 0)
 
-    @pytest.mark.parametrize(
-        "client",
-        [
-            pytest.param(("fastapi", {"whitelist": {"whitelisted_user"}}), id="fastapi"),
-            pytest.param(("litestar", {"whitelist": {"whitelisted_user"}}), id="litestar"),
-        ],
-        indirect=True,
-    )
-    def test_whitelisted_client(self, client):
+    @pytest.mark.parametrize("client", [{"whitelist": {"whitelisted_user"}}], indirect=True)
+    async def test_whitelisted_client(self, client):
         client.mock_identity_extractor._identity = "whitelisted_user"
 
-        response = client.get("/", headers={"X-RateLimit-Activate": "true"})
+        response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
         assert response.status_code == 200
         assert_backend_hits(client.mock_backend, 0)
 
-    def test_default_policy(self, client):
-        client.get("/", headers={"X-RateLimit-Activate": "true"})
+    @pytest.mark.parametrize("peeked", ["whitelisted_user", "peeked_user"])
+    async def test_identity_peek_skips_extractor_await(self, peeked):
+        class PeekableIdentityExtractor(MockIdentityExtractor):
+            awaited = 0
+
+            def peek(self, scope):
+                return peeked
+
+            async def __call__(self, scope):
+                self.awaited += 1
+                return await super().__call__(scope)
+
+        extractor = PeekableIdentityExtractor()
+        middleware = RateLimitingMiddleware(
+            app=minimal_asgi(),
+            config=RateLimitConfig(activation_header="X-RateLimit-Activate", whitelist={"whitelisted_user"}),
+            backend=MockRateLimitingBackend(),
+            identity_extractor=extractor,
+            logger=null_logger,
+        )
+
+        async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://testserver") as client:
+            response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert response.status_code == 200
+        assert extractor.awaited == 0
+        if peeked == "whitelisted_user":
+            assert_backend_hits(middleware.backend, 0)
+        else:
+            assert middleware.backend.last_key.startswith("ratelimit:peeked_user")
+
+    async def test_async_mock_identity_extractor_is_awaited(self):
+        extractor = AsyncMock(return_value="mock_user")
+        middleware = RateLimitingMiddleware(
+            app=minimal_asgi(),
+            config=RateLimitConfig(activation_header="X-RateLimit-Activate"),
+            backend=MockRateLimitingBackend(),
+            identity_extractor=extractor,
+            logger=null_logger,
+        )
+
+        async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://testserver") as client:
+            response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert response.status_code == 200
+        assert middleware._peek_identity is None
+        extractor.assert_awaited_once()
+        assert middleware.backend.last_key.startswith("ratelimit:mock_user")
+
+    async def test_identity_peek_falls_back_to_extractor(self, client):
+        client.middleware._peek_identity = lambda scope: None
+
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
+        assert client.mock_backend.last_key.startswith("ratelimit:test_client")
+
+    async def test_rate_limit_key_escapes_colons(self, client):
+        client.mock_identity_extractor._identity = "user:1"
+
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
+        assert client.mock_backend.last_key == "ratelimit:user_1:/:GET"
+
+    async def test_default_policy(self, client):
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
 
         assert client.mock_backend.last_limit == 100
         assert client.mock_backend.last_window == 60
 
+    @pytest.mark.parametrize("client", [{"policy_overrides": {"/": PolicyConfig(limit=10, window=50)}}], indirect=True)
+    async def test_route_override_policy(self, client):
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
+        assert client.mock_backend.last_limit == 10
+        assert client.mock_backend.last_window == 50
+
     @pytest.mark.parametrize(
         "client",
         [
-            pytest.param(("fastapi", {"policy_overrides": {"/": PolicyConfig(limit=10, window=50)}}), id="fastapi"),
-            pytest.param(("litestar", {"policy_overrides": {"/": PolicyConfig(limit=10, window=50)}}), id="litestar"),
+            {
+                "policy_overrides": {
+                    "/users/{id}": PolicyConfig(limit=10, window=50),
+                    "/users/admin": PolicyConfig(limit=1, window=50),
+                }
+            }
         ],
         indirect=True,
     )
-    def test_route_override_policy(self, client):
-        client.get("/", headers={"X-RateLimit-Activate": "true"})
-        assert client.mock_backend.last_limit == 10
-        assert client.mock_backend.last_window == 50
+    async def test_wildcard_route_override_policy(self, client):
+        await client.get("/users/42", headers={"X-RateLimit-Activate": "true"})
+        assert (client.mock_backend.last_limit, client.mock_backend.last_window) == (10, 50)
+
+        await client.get("/users/admin", headers={"X-RateLimit-Activate": "true"})
+        assert (client.mock_backend.last_limit, client.mock_backend.last_window) == (1, 50)
+
+        await client.get("/users", headers={"X-RateLimit-Activate": "true"})
+        assert (client.mock_backend.last_limit, client.mock_backend.last_window) == (100, 60)
 
     @pytest.mark.parametrize(
         "client",
         [
-            pytest.param(
-                ("fastapi", {"policy_overrides": {"/": {"GET": PolicyConfig(limit=5, window=30)}}}), id="fastapi"
-            ),
-            pytest.param(
-                ("litestar", {"policy_overrides": {"/": {"GET": PolicyConfig(limit=5, window=30)}}}), id="litestar"
-            ),
+            {
+                "policy_overrides": {
+                    "/users/admin": {"GET": PolicyConfig(limit=1, window=50)},
+                    "/users/*": PolicyConfig(limit=10, window=50),
+                }
+            }
         ],
         indirect=True,
     )
-    def test_method_override_policy(self, client):
-        client.get("/", headers={"X-RateLimit-Activate": "true"})
+    async def test_exact_route_without_method_override_skips_wildcards(self, client):
+        await client.post("/users/admin", headers={"X-RateLimit-Activate": "true"})
+        assert (client.mock_backend.last_limit, client.mock_backend.last_window) == (100, 60)
+
+        await client.post("/users/42", headers={"X-RateLimit-Activate": "true"})
+        assert (client.mock_backend.last_limit, client.mock_backend.last_window) == (10, 50)
+
+    @pytest.mark.parametrize(
+        "client", [{"policy_overrides": {"/": {"GET": PolicyConfig(limit=5, window=30)}}}], indirect=True
+    )
+    async def test_method_override_policy(self, client):
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
         assert client.mock_backend.last_limit == 5
         assert client.mock_backend.last_window == 30
 
-    def test_metrics_incremented(self, client):
-        client.get("/", headers={"X-RateLimit-Activate": "true"})
+    @pytest.mark.parametrize(
+        "client", [{"policy_overrides": {"/": {"POST": PolicyConfig(limit=5, window=30)}}}], indirect=True
+    )
+    async def test_unmatched_method_override_uses_default_policy(self, client):
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
+        assert client.mock_backend.last_limit == 100
+        assert client.mock_backend.last_window == 60
+
+    async def test_metrics_incremented(self, client):
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
         assert_metrics_count(client.mock_metrics_collector, "total_requests", 1)
         assert_metrics_count(client.mock_metrics_collector, "rate_limited_requests", 0)
 
@@ -287,15 +367,55 @@ class TestRateLimitingMiddleware:
 
         client.mock_backend.hit = mock_hit_denied
 
-        client.get("/", headers={"X-RateLimit-Activate": "true"})
+        await client.get("/", headers={"X-RateLimit-Activate": "true"})
         assert_metrics_count(client.mock_metrics_collector, "total_requests", 2)
         assert_metrics_count(client.mock_metrics_collector, "rate_limited_requests", 1)
 
+    async def test_counters_resolved_once_at_init(self, client):
+        client.mock_backend._allowed = False
+        for _ in range(5):
+            await client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert sorted(client.mock_metrics_collector.calls) == ["rate_limited_requests", "total_requests"]
+        assert_metrics_count(client.mock_metrics_collector, "total_requests", 5)
+        assert_metrics_count(client.mock_metrics_collector, "rate_limited_requests", 5)
+
+    def test_fastapi_integration(self):
+        app = FastAPI()
+
+        @app.get("/")
+        async def read_root():
+            return {"message": "Hello, world!"}
+
+        middleware = build_middleware(app)
+        with FastAPITestClient(middleware) as test_client:
+            response = test_client.get("/", headers={"X-RateLimit-Activate": "true"})
+            middleware.backend._allowed = False
+            denied = test_client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert_response_success(response, {"message": "Hello, world!"})
+        assert response.headers["x-ratelimit-limit"] == "100"
+        assert_rate_limited_response(denied, expected_remaining=5)
+
+    def test_litestar_integration(self):
+        @get("/")
+        async def read_root() -> dict[str, str]:
+            return {"message": "Hello, world!"}
+
+        middleware = build_middleware(Litestar(route_handlers=[read_root]))
+        with LitestarTestClient(middleware) as test_client:
+            response = test_client.get("/", headers={"X-RateLimit-Activate": "true"})
+            middleware.backend._allowed = False
+            denied = test_client.get("/", headers={"X-RateLimit-Activate": "true"})
+
+        assert_response_success(response, {"message": "Hello, world!"})
+        assert response.headers["x-ratelimit-limit"] == "100"
+        assert_rate_limited_response(denied, expected_remaining=5)
+
     @pytest.mark.asyncio
     async def test_websocket_scope_skipped(self):
         mock_backend = MockRateLimitingBackend()
         mock_identity_extractor = MockIdentityExtractor()
-        mock_logger = MagicMock(spec=logging.Logger)
         mock_metrics_collector = MockMetricsCollector()
 
         app = FastAPI()
@@ -310,7 +430,7 @@ class TestRateLimitingMiddleware:
             config=config,
             backend=mock_backend,
             identity_extractor=mock_identity_extractor,
-            logger=mock_logger,
+            logger=null_logger,
             metrics_collector=mock_metrics_collector,
         )
 
@@ -326,14 +446,229 @@ class TestRateLimitingMiddleware:
 
         assert_backend_hits(mock_backend, 0)
 
+    async def test_websocket_scope_touches_no_http_state(self):
+        class Untouchable:
+            def __getattr__(self, name):
+                raise AttributeError(f"{name!r} accessed on the non-HTTP path")
+
+        forwarded = []
+
+        async def app(scope, receive, send):
+            forwarded.append(scope["type"])
+
+        middleware = RateLimitingMiddleware(
+            app=app,
+            config=RateLimitConfig(activation_header="X-RateLimit-Activate"),
+            backend=MockRateLimitingBackend(),
+            identity_extractor=MockIdentityExtractor(),
+            logger=null_logger,
+        )
+        for name in ("config", "backend", "identity_extractor", "logger", "total_requests", "_activation_header"):
+            setattr(middleware, name, Untouchable())
+
+        await middleware({"type": "websocket"}, None, None)
+
+        assert forwarded == ["websocket"]
+
+    @pytest.mark.parametrize("app_headers", [None, (), ((b"x-app", b"1"),), [(b"x-app", b"1")]])
+    async def test_rate_limit_headers_appended_to_raw_start_message(self, app_headers):
+        async def raw_app(scope, receive, send):
+            start = {"type": "http.response.start", "status": 200}
+            if app_headers is not None:
+                start["headers"] = app_headers
+            await send(start)
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = RateLimitingMiddleware(
+            app=raw_app,
+            config=RateLimitConfig(activation_header="X-RateLimit-Activate"),
+            backend=MockRateLimitingBackend(),
+            identity_extractor=MockIdentityExtractor(),
+            logger=null_logger,
+        )
+
+        sent = []
+
+        async def mock_receive():
+            pass
+
+        async def mock_send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "path": "/",
+            "method": "GET",
+            "query_string": b"",
+            "headers": [(b"x-ratelimit-activate", b"true")],
+        }
+
+        expected = [
+            *(app_headers or ()),
+            (b"x-ratelimit-limit", b"100"),
+            (b"x-ratelimit-remaining", b"5"),
+            (b"x-ratelimit-reset", b"100"),
+        ]
+
+        await middleware(scope, mock_receive, mock_send)
+
+        assert list(sent[0]["headers"]) == expected
+
+    async def test_shared_app_header_list_left_untouched(self, client):
+        shared_headers = [(b"content-type", b"application/json")]
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": shared_headers})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        client.middleware.app = app
+
+        for _ in range(2):
+            response = await client.get("/", headers={"X-RateLimit-Activate": "true"})
+            assert response.headers.get_list("x-ratelimit-limit") == ["100"]
+
+        assert shared_headers == [(b"content-type", b"application/json")]
+
+
+@pytest.mark.parametrize(
+    "headers,query_string,expected",
+    [
+        ([], b"", False),
+        ([(b"x-ratelimit-activate", b"true")], b"", True),
+        ([(b"x-ratelimit-activate", b"Off")], b"ratelimit=true", False),
+        ([], b"ratelimit=true", True),
+        ([], b"ratelimit%5Fx=true&rate%6Cimit=1", True),
+        ([], b"ratelimit=%4FFF", False),
+    ],
+)
+def test_is_rate_limiting_activated_with_config(headers, query_string, expected):
+    config = RateLimitConfig(activation_header="X-RateLimit-Activate", activation_query_param="ratelimit")
+    scope = {"type": "http", "headers": headers, "query_string": query_string}
+
+    assert is_rate_limiting_activated(scope, config) is expected  # type: ignore[arg-type]
+
+
+def test_policy_overrides_are_copied():
+    overrides = {"/": {"GET": PolicyConfig(limit=5, window=30)}}
+    config = RateLimitConfig(activation_header="X-RateLimit-Activate", policy_overrides=overrides)
+
+    overrides["/"]["POST"] = PolicyConfig(limit=1, window=1)
+    overrides["/other"] = PolicyConfig(limit=1, window=1)
+
+    assert config.policy_overrides == {"/": {"GET": PolicyConfig(limit=5, window=30)}}
+
+
+def test_config_supports_copy_pickle_and_asdict():
+    config = RateLimitConfig(
+        activation_header="X-RateLimit-Activate",
+        whitelist={"127.0.0.1"},
+        policy_overrides={"/": PolicyConfig(limit=10, window=50), "/items": {"GET": PolicyConfig(limit=5, window=30)}},
+    )
+
+    assert copy.deepcopy(config) == config
+    assert pickle.loads(pickle.dumps(config)) == config
+    assert dataclasses.asdict(config)["policy_overrides"] == {
+        "/": {"limit": 10, "window": 50},
+        "/items": {"GET": {"limit": 5, "window": 30}},
+    }
+
+
+def test_compiled_policy_table_is_read_only():
+    config = RateLimitConfig(activation_header="X-RateLimit-Activate", policy_overrides={"/": PolicyConfig(10, 50)})
+    policies, _ = compile_rate_limit_policies(config)
+
+    with pytest.raises(TypeError):
+        policies[("/other", None)] = (1, 1)  # type: ignore[index]
+
+
+def test_policy_overrides_compile_to_flat_table():
+    config = RateLimitConfig(
+        activation_header="X-RateLimit-Activate",
+        policy_overrides={
+            "/": PolicyConfig(limit=10, window=50),
+            "/items": {"GET": PolicyConfig(limit=5, window=30), "POST": PolicyConfig(limit=1, window=30)},
+        },
+    )
+
+    policies, wildcard_policies = compile_rate_limit_policies(config)
+
+    assert policies == {
+        ("/", None): (10, 50),
+        ("/items", "GET"): (5, 30),
+        ("/items", "POST"): (1, 30),
+    }
+    assert wildcard_policies is None
+
+
+def test_invalid_policy_override_rejected():
+    config = RateLimitConfig(activation_header="X-RateLimit-Activate")
+    object.__setattr__(config, "policy_overrides", {"/": (10, 50)})
+
+    with pytest.raises(TypeError, match="Policy override for '/'"):
+        compile_rate_limit_policies(config)
+
+
+class TestPolicyTrie:
+    @pytest.fixture
+    def trie(self):
+        trie = PolicyTrie()
+        trie.insert("/users/{id}", None, (10, 60))
+        trie.insert("/users/{id}", "POST", (1, 60))
+        trie.insert("/users/admin", None, (100, 60))
+        trie.insert("/v1/*/items", "GET", (5, 30))
+        return trie
+
+    @pytest.mark.parametrize(
+        "path,method,expected",
+        [
+            ("/users/42", "GET", (10, 60)),
+            ("/users/42", "POST", (1, 60)),
+            ("/users/admin", "GET", (100, 60)),
+            ("/v1/shop/items", "GET", (5, 30)),
+            ("/v1/shop/items", "POST", None),
+            ("/users/", "GET", None),
+            ("/users/42/posts", "GET", None),
+            ("/", "GET", None),
+        ],
+    )
+    def test_match(self, trie, path, method, expected):
+        assert trie.match(path, method) == expected
+
+    def test_literal_branch_backtracks_to_wildcard(self):
+        trie = PolicyTrie()
+        trie.insert("/users/admin/settings", None, (1, 60))
+        trie.insert("/users/*/profile", None, (2, 60))
+
+        assert trie.match("/users/admin/profile", "GET") == (2, 60)
+
+    def test_match_with_many_rules(self):
+        trie = PolicyTrie()
+        for i in range(1000):
+            trie.insert(f"/tenant{i}/{{id}}", None, (i + 1, 60))
+
+        assert trie.match("/tenant0/abc", "GET") == (1, 60)
+        assert trie.match("/tenant999/abc", "GET") == (1000, 60)
+        assert trie.match("/tenant1000/abc", "GET") is None
+
+
+class FakeClock:
+    def __init__(self, t):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
 
 class TestInMemoryBackend:
     @pytest.fixture
-    def in_memory_backend(self):
-        return InMemoryBackend()
+    def clock(self):
+        return FakeClock(100)
+
+    @pytest.fixture
+    def in_memory_backend(self, clock):
+        return InMemoryBackend(clock=clock)
 
-    @patch("time.time", return_value=100)
-    async def test_hit_allowed(self, mock_time, in_memory_backend):
+    async def test_hit_allowed(self, in_memory_backend):
         result = await in_memory_backend.hit("key1", 5, 60)
         allowed = result.allowed
         remaining = result.remaining
@@ -342,10 +677,11 @@ class TestInMemoryBackend:
         assert allowed is True
         assert remaining == 4
         assert reset == 160
-        assert in_memory_backend._counters == {("key1", 60): {"count": 1, "window_start_time": 100}}
+        assert list(in_memory_backend._counters) == [("key1", 60)]
+        assert in_memory_backend._counters[("key1", 60)].count == 1
+        assert in_memory_backend._counters[("key1", 60)].window_start_time == 100
 
-    @patch("time.time", return_value=100)
-    async def test_hit_denied(self, mock_time, in_memory_backend):
+    async def test_hit_denied(self, in_memory_backend):
         for _ in range(6):
             result = await in_memory_backend.hit("key1", 5, 60)
             allowed = result.allowed
@@ -355,34 +691,200 @@ class TestInMemoryBackend:
         assert allowed is False
         assert remaining == 0
         assert reset == 160
-        assert in_memory_backend._counters == {("key1", 60): {"count": 6, "window_start_time": 100}}
+        assert list(in_memory_backend._counters) == [("key1", 60)]
+        assert in_memory_backend._counters[("key1", 60)].count == 6
+        assert in_memory_backend._counters[("key1", 60)].window_start_time == 100
 
-    @patch("time.time")
-    async def test_window_reset(self, mock_time, in_memory_backend):
-        mock_time.return_value = 100
+    async def test_window_reset(self, clock, in_memory_backend):
+        clock.t = 100
         await in_memory_backend.hit("key1", 5, 60)
-        assert in_memory_backend._counters[("key1", 60)]["count"] == 1
+        assert in_memory_backend._counters[("key1", 60)].count == 1
 
-        mock_time.return_value = 159
+        clock.t = 159
         await in_memory_backend.hit("key1", 5, 60)
-        assert in_memory_backend._counters[("key1", 60)]["count"] == 2
+        assert in_memory_backend._counters[("key1", 60)].count == 2
 
-        mock_time.return_value = 160
+        clock.t = 160
         await in_memory_backend.hit("key1", 5, 60)
-        assert in_memory_backend._counters[("key1", 60)]["count"] == 1
-        assert in_memory_backend._counters[("key1", 60)]["window_start_time"] == 160
+        assert in_memory_backend._counters[("key1", 60)].count == 1
+        assert in_memory_backend._counters[("key1", 60)].window_start_time == 160
 
-    @patch("time.time", return_value=100)
-    async def test_cleanup_expired_entries(self, mock_time, in_memory_backend):
+    async def test_cleanup_expired_entries(self, clock, in_memory_backend):
         await in_memory_backend.hit("key1", 5, 60)
         await in_memory_backend.hit("key2", 3, 30)
 
         assert ("key1", 60) in in_memory_backend._counters
         assert ("key2", 30) in in_memory_backend._counters
 
-        mock_time.return_value = 131
+        clock.t = 131
         await in_memory_backend.hit("key3", 10, 10)
 
         assert ("key1", 60) in in_memory_backend._counters
         assert ("key2", 30) not in in_memory_backend._counters
         assert ("key3", 10) in in_memory_backend._counters
+
+    async def test_cleanup_only_pops_expired_windows(self, clock, in_memory_backend):
+        for i in range(1000):
+            await in_memory_backend.hit(f"long{i}", 5, 60)
+        await in_memory_backend.hit("short", 5, 10)
+
+        clock.t = 110
+        await in_memory_backend.hit("new", 5, 60)
+
+        assert ("short", 10) not in in_memory_backend._counters
+        assert len(in_memory_backend._counters) == 1001
+        assert len(in_memory_backend._expirations) == 1001
+
+    async def test_cleanup_with_many_staggered_windows(self, clock, in_memory_backend):
+        for i in range(100_000):
+            await in_memory_backend.hit(f"key{i}", 5, 1 + i % 1000)
+
+        clock.t = 600
+        await in_memory_backend.hit("key100001", 5, 60)
+
+        # Windows of 1..500 seconds have expired, the rest are left untouched
+        assert len(in_memory_backend._counters) == 50_001
+        assert len(in_memory_backend._expirations) == 50_001
+        assert in_memory_backend._expirations[0][0] > 600
+
+
+class TestTokenBucketBackend:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(100)
+
+    @pytest.fixture
+    def token_bucket_backend(self, clock):
+        return TokenBucketBackend(clock=clock)
+
+    async def test_hit_allowed(self, token_bucket_backend):
+        result = await token_bucket_backend.hit("key1", 5, 60)
+
+        assert result.allowed is True
+        assert result.remaining == 4
+        assert result.reset == 112
+        assert token_bucket_backend._buckets == {("key1", 60): (4, 100_000_000_000)}
+
+    async def test_fractional_seconds_clock(self, clock, token_bucket_backend):
+        clock.t = 100.25
+        await token_bucket_backend.hit("key1", 5, 60)
+
+        assert token_bucket_backend._buckets == {("key1", 60): (4, 100_250_000_000)}
+
+    async def test_burst_denied(self, token_bucket_backend):
+        for _ in range(6):
+            result = await token_bucket_backend.hit("key1", 5, 60)
+
+        assert result.allowed is False
+        assert result.remaining == 0
+        assert result.reset == 160
+
+    async def test_clock_stepping_backwards(self, clock, token_bucket_backend):
+        for _ in range(3):
+            await token_bucket_backend.hit("key1", 5, 60)
+
+        clock.t -= 30
+        result = await token_bucket_backend.hit("key1", 5, 60)
+
+        assert result.allowed is True
+        assert result.remaining == 1
+        assert token_bucket_backend._buckets == {("key1", 60): (1, 70_000_000_000)}
+
+    async def test_tokens_refill_gradually(self, clock, token_bucket_backend):
+        clock.t = 100
+        for _ in range(5):
+            await token_bucket_backend.hit("key1", 5, 60)
+
+        clock.t = 111
+        result = await token_bucket_backend.hit("key1", 5, 60)
+        assert result.allowed is False
+
+        # One token is earned every 12 seconds; the partial interval is carried over
+        clock.t = 113
+        result = await token_bucket_backend.hit("key1", 5, 60)
+        assert result.allowed is True
+        assert result.remaining == 0
+        assert token_bucket_backend._buckets[("key1", 60)] == (0, 112_000_000_000)
+
+    async def test_bucket_never_exceeds_limit(self, clock, token_bucket_backend):
+        clock.t = 100
+        await token_bucket_backend.hit("key1", 5, 60)
+
+        clock.t = 1000
+        result = await token_bucket_backend.hit("key1", 5, 60)
+        assert result.remaining == 4
+
+    async def test_window_boundary_burst_rejected(self, clock, token_bucket_backend):
+        clock.t = 59
+        assert all([(await token_bucket_backend.hit("key1", 5, 60)).allowed for _ in range(5)])
+
+        clock.t = 60
+        assert not any([(await token_bucket_backend.hit("key1", 5, 60)).allowed for _ in range(5)])
+
+    async def test_cleanup_idle_buckets(self, clock, token_bucket_backend):
+        clock.t = 100
+        await token_bucket_backend.hit("idle", 5, 10)
+
+        clock.t = 110
+        for _ in range(1023):
+            await token_bucket_backend.hit("busy", 1000, 60)
+
+        assert ("idle", 10) not in token_bucket_backend._buckets
+        assert ("busy", 60) in token_bucket_backend._buckets
+
+
+class TestSlidingWindowBackend:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(100)
+
+    @pytest.fixture
+    def sliding_window_backend(self, clock):
+        return SlidingWindowBackend(clock=clock)
+
+    async def test_hit_allowed(self, sliding_window_backend):
+        result = await sliding_window_backend.hit("key1", 5, 60)
+
+        assert result.allowed is True
+        assert result.remaining == 4
+        assert result.reset == 160
+
+    async def test_hit_denied(self, sliding_window_backend):
+        for _ in range(6):
+            result = await sliding_window_backend.hit("key1", 5, 60)
+
+        assert result.allowed is False
+        assert result.remaining == 0
+        assert result.reset == 160
+        assert len(sliding_window_backend._logs[("key1", 60)]) == 5
+
+    async def test_hits_slide_out_of_window(self, clock, sliding_window_backend):
+        for now in (100, 110, 120):
+            clock.t = now
+            await sliding_window_backend.hit("key1", 3, 60)
+
+        clock.t = 159
+        assert (await sliding_window_backend.hit("key1", 3, 60)).allowed is False
+
+        clock.t = 160
+        result = await sliding_window_backend.hit("key1", 3, 60)
+        assert result.allowed is True
+        assert result.reset == 170
+
+    async def test_window_boundary_burst_rejected(self, clock, sliding_window_backend):
+        clock.t = 59
+        assert all([(await sliding_window_backend.hit("key1", 5, 60)).allowed for _ in range(5)])
+
+        clock.t = 60
+        assert not any([(await sliding_window_backend.hit("key1", 5, 60)).allowed for _ in range(5)])
+
+    async def test_cleanup_idle_logs(self, clock, sliding_window_backend):
+        clock.t = 100
+        await sliding_window_backend.hit("idle", 5, 10)
+
+        clock.t = 110
+        for _ in range(1023):
+            await sliding_window_backend.hit("busy", 1000, 60)
+
+        assert ("idle", 10) not in sliding_window_backend._logs
+        assert ("busy", 60) in sliding_window_backend._logs
@@ -1,10 +1,29 @@
 import pytest
 import asyncio
+import time
 import fakeredis
 
 from asgi_toolkit.rate_limiting import RedisBackend
 
 
+@pytest.fixture(scope="session")
+def fakeredis_server():
+    """One in-process server per session (and per xdist worker); tests isolate themselves by key prefix."""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+async def redis_client(fakeredis_server):
+    client = fakeredis.FakeAsyncRedis(server=fakeredis_server, decode_responses=True)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+def key_prefix(request):
+    return request.node.nodeid
+
+
 @pytest.mark.parametrize(
     "scenario",
     [
@@ -32,30 +51,22 @@ from asgi_toolkit.rate_limiting import RedisBackend
     ],
 )
 @pytest.mark.asyncio
-async def test_redis_backend_rate_limiting(scenario):
+async def test_redis_backend_rate_limiting(scenario, redis_client, key_prefix):
     """Parametrized integration test for RedisBackend using FakeAsyncRedis client."""
-    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
-
-    try:
-        await redis_client.flushdb()
-
-        backend = RedisBackend(redis_client)
-
-        key = scenario["key"]
-        limit = scenario["limit"]
-        window = scenario["window"]
-        expected_sequence = scenario["expected_sequence"]
+    backend = RedisBackend(redis_client)
 
-        for expected_allowed, expected_remaining in expected_sequence:
-            result = await backend.hit(key, limit, window)
+    key = f"{key_prefix}:{scenario['key']}"
+    limit = scenario["limit"]
+    window = scenario["window"]
+    expected_sequence = scenario["expected_sequence"]
 
-            assert result.allowed == expected_allowed, f"Unexpected allowed status for {key}"
-            assert result.remaining == expected_remaining, f"Unexpected remaining hits for {key}"
+    for expected_allowed, expected_remaining in expected_sequence:
+        result = await backend.hit(key, limit, window)
 
-            assert result.reset > 0, "Reset time should be a positive timestamp"
+        assert result.allowed == expected_allowed, f"Unexpected allowed status for {key}"
+        assert result.remaining == expected_remaining, f"Unexpected remaining hits for {key}"
 
-    finally:
-        await redis_client.aclose()
+        assert result.reset > 0, "Reset time should be a positive timestamp"
 
 
 @pytest.mark.parametrize(
@@ -66,30 +77,51 @@ async def test_redis_backend_rate_limiting(scenario):
     ],
 )
 @pytest.mark.asyncio
-async def test_redis_backend_concurrent_hits(concurrent_hits):
+async def test_redis_backend_concurrent_hits(concurrent_hits, redis_client, key_prefix):
     """Parametrized test for concurrent rate limiting with multiple clients."""
-    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    backend = RedisBackend(redis_client)
+    key = f"{key_prefix}:{concurrent_hits['key']}"
+    limit = concurrent_hits["limit"]
+    window = concurrent_hits["window"]
+    total_hits = concurrent_hits["total_hits"]
 
-    try:
-        await redis_client.flushdb()
+    async def hit_backend():
+        return await backend.hit(key, limit, window)
 
-        backend = RedisBackend(redis_client)
-        key = concurrent_hits["key"]
-        limit = concurrent_hits["limit"]
-        window = concurrent_hits["window"]
-        total_hits = concurrent_hits["total_hits"]
+    results = await asyncio.gather(*[hit_backend() for _ in range(total_hits)])
 
-        async def hit_backend():
-            return await backend.hit(key, limit, window)
+    allowed_hits = [result for result in results if result.allowed is True]
+    assert len(allowed_hits) == limit, f"Expected {limit} allowed hits"
 
-        results = await asyncio.gather(*[hit_backend() for _ in range(total_hits)])
+    last_result = results[-1]
+    assert last_result.allowed is False, "Last hit should be denied"
+    assert last_result.remaining == 0, "Remaining hits should be 0 when rate limit is exceeded"
 
-        allowed_hits = [result for result in results if result.allowed is True]
-        assert len(allowed_hits) == limit, f"Expected {limit} allowed hits"
 
-        last_result = results[-1]
-        assert last_result.allowed is False, "Last hit should be denied"
-        assert last_result.remaining == 0, "Remaining hits should be 0 when rate limit is exceeded"
+@pytest.mark.asyncio
+async def test_redis_backend_reloads_flushed_script(redis_client, key_prefix):
+    """The backend recovers when the server's script cache is flushed."""
+    backend = RedisBackend(redis_client)
+
+    result = await backend.hit(f"{key_prefix}:flushed_client", 2, 1)
+    assert result.allowed is True
+    assert result.remaining == 1
+
+    await redis_client.script_flush()
+
+    result = await backend.hit(f"{key_prefix}:flushed_client", 2, 1)
+    assert result.allowed is True
+    assert result.remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_reset_has_sub_second_precision(redis_client, key_prefix):
+    """The reset timestamp follows the millisecond TTL rather than whole seconds."""
+    backend = RedisBackend(redis_client)
+
+    before = time.time()
+    result = await backend.hit(f"{key_prefix}:precise_client", 5, 2)
+    after = time.time()
 
-    finally:
-        await redis_client.aclose()
+    assert before + 1.9 <= result.reset <= after + 2
+    assert await redis_client.pttl(f"rate_limit:{key_prefix}:precise_client:2") > 1000